@@ -0,0 +1,44 @@
+"""Add document cache
+
+Revision ID: 7d2b9f4e6c15
+Revises: 5a8e0c3f1b62
+Create Date: 2026-10-17 11:20:15.204836
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2b9f4e6c15'
+down_revision: Union[str, None] = '5a8e0c3f1b62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('document_cache',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('content_hash', sa.String(), nullable=False),
+    sa.Column('file_type', sa.String(), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('ai_analysis', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('last_accessed_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_document_cache_lookup', 'document_cache', ['user_id', 'content_hash', 'file_type'], unique=True)
+    op.create_index('ix_document_cache_last_accessed_at', 'document_cache', ['last_accessed_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_document_cache_last_accessed_at', table_name='document_cache')
+    op.drop_index('ix_document_cache_lookup', table_name='document_cache')
+    op.drop_table('document_cache')
@@ -0,0 +1,56 @@
+"""Add message full-text search index
+
+Revision ID: 9b4c6a1d2e87
+Revises: 7d2b9f4e6c15
+Create Date: 2026-10-17 12:05:48.771203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b4c6a1d2e87'
+down_revision: Union[str, None] = '7d2b9f4e6c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    
+    if dialect == 'sqlite':
+        # External-content FTS5 table kept in sync by triggers. The index is
+        # keyed on the implicit rowid of messages; run
+        # INSERT INTO messages_fts(messages_fts) VALUES ('rebuild') after a VACUUM.
+        op.execute("CREATE VIRTUAL TABLE messages_fts USING fts5(content, content='messages', content_rowid='rowid')")
+        op.execute("""CREATE TRIGGER messages_fts_ai AFTER INSERT ON messages BEGIN
+            INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content);
+        END""")
+        op.execute("""CREATE TRIGGER messages_fts_ad AFTER DELETE ON messages BEGIN
+            INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+        END""")
+        op.execute("""CREATE TRIGGER messages_fts_au AFTER UPDATE OF content ON messages BEGIN
+            INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+            INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content);
+        END""")
+        # Index the existing messages
+        op.execute("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        op.execute("CREATE INDEX ix_messages_content_fts ON messages USING gin (to_tsvector('simple', content))")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS messages_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS messages_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS messages_fts_ai")
+        op.execute("DROP TABLE IF EXISTS messages_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_messages_content_fts")
@@ -0,0 +1,64 @@
+"""Track chat summary progress by last message
+
+Revision ID: a4d9e2c7b815
+Revises: f1c4a8d2b593
+Create Date: 2026-10-17 19:26:37.904118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d9e2c7b815'
+down_revision: Union[str, None] = 'f1c4a8d2b593'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('chat_summaries') as batch_op:
+        batch_op.add_column(sa.Column('last_message_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column('last_message_id', sa.String(), nullable=True))
+
+    # The summary covered the oldest message_count messages; point the
+    # watermark at the last of them
+    connection = op.get_bind()
+    summaries = connection.execute(sa.text(
+        "SELECT chat_id, message_count FROM chat_summaries WHERE message_count > 0"
+    )).all()
+    for chat_id, message_count in summaries:
+        last_message_id = connection.scalar(sa.text(
+            "SELECT id FROM messages WHERE chat_id = :chat_id ORDER BY timestamp, id LIMIT 1 OFFSET :offset"
+        ), {"chat_id": chat_id, "offset": message_count - 1})
+        if last_message_id is None:
+            continue
+        connection.execute(sa.text(
+            """UPDATE chat_summaries
+            SET last_message_id = :message_id,
+                last_message_at = (SELECT timestamp FROM messages WHERE id = :message_id)
+            WHERE chat_id = :chat_id"""
+        ), {"chat_id": chat_id, "message_id": last_message_id})
+
+    with op.batch_alter_table('chat_summaries') as batch_op:
+        batch_op.drop_column('message_count')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('chat_summaries') as batch_op:
+        batch_op.add_column(sa.Column('message_count', sa.Integer(), nullable=False, server_default='0'))
+
+    op.execute("""UPDATE chat_summaries SET message_count = (
+        SELECT COUNT(*) FROM messages m
+        WHERE m.chat_id = chat_summaries.chat_id
+          AND (m.timestamp < chat_summaries.last_message_at
+               OR (m.timestamp = chat_summaries.last_message_at AND m.id <= chat_summaries.last_message_id))
+    ) WHERE last_message_id IS NOT NULL""")
+
+    with op.batch_alter_table('chat_summaries') as batch_op:
+        batch_op.drop_column('last_message_id')
+        batch_op.drop_column('last_message_at')
@@ -0,0 +1,30 @@
+"""Add keyset pagination indexes
+
+Revision ID: b6e1d3f8a214
+Revises: 9b4c6a1d2e87
+Create Date: 2026-10-17 13:31:09.642570
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e1d3f8a214'
+down_revision: Union[str, None] = '9b4c6a1d2e87'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_chats_user_id_created_at', 'chats', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_messages_chat_id_timestamp', 'messages', ['chat_id', 'timestamp', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_messages_chat_id_timestamp', table_name='messages')
+    op.drop_index('ix_chats_user_id_created_at', table_name='chats')
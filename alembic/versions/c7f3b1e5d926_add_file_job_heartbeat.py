@@ -0,0 +1,33 @@
+"""Add file job owner and heartbeat
+
+Revision ID: c7f3b1e5d926
+Revises: a4d9e2c7b815
+Create Date: 2026-10-17 20:03:52.417730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7f3b1e5d926'
+down_revision: Union[str, None] = 'a4d9e2c7b815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Active jobs left without a heartbeat are failed by the first worker
+    # that starts
+    op.add_column('file_jobs', sa.Column('worker_id', sa.String(), nullable=True))
+    op.add_column('file_jobs', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('file_jobs') as batch_op:
+        batch_op.drop_column('heartbeat_at')
+        batch_op.drop_column('worker_id')
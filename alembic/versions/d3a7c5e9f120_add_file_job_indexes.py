@@ -0,0 +1,30 @@
+"""Add file job indexes
+
+Revision ID: d3a7c5e9f120
+Revises: b6e1d3f8a214
+Create Date: 2026-10-17 14:05:27.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a7c5e9f120'
+down_revision: Union[str, None] = 'b6e1d3f8a214'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_file_jobs_user_id_created_at', 'file_jobs', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_file_jobs_status', 'file_jobs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_file_jobs_status', table_name='file_jobs')
+    op.drop_index('ix_file_jobs_user_id_created_at', table_name='file_jobs')
@@ -0,0 +1,38 @@
+"""Normalize chat and message timestamps for value cursors
+
+Revision ID: d5e8a3f1c609
+Revises: c7f3b1e5d926
+Create Date: 2026-10-17 20:47:15.286031
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e8a3f1c609'
+down_revision: Union[str, None] = 'c7f3b1e5d926'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    
+    if dialect == 'sqlite':
+        # CURRENT_TIMESTAMP defaults were stored without fractional seconds,
+        # which never compare equal to the value carried by a cursor; give
+        # them the microsecond format the model now writes
+        for table, column in (('chats', 'created_at'), ('chats', 'updated_at'), ('messages', 'timestamp')):
+            op.execute(f"""UPDATE {table}
+                SET {column} = strftime('%Y-%m-%d %H:%M:%f', {column}) || '000'
+                WHERE length({column}) = 19""")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The normalized values are still valid timestamps
+    pass
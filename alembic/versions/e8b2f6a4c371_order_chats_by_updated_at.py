@@ -0,0 +1,30 @@
+"""Order chats by updated_at
+
+Revision ID: e8b2f6a4c371
+Revises: d3a7c5e9f120
+Create Date: 2026-10-17 15:22:48.105937
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b2f6a4c371'
+down_revision: Union[str, None] = 'd3a7c5e9f120'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_chats_user_id_updated_at', 'chats', ['user_id', 'updated_at', 'id'], unique=False)
+    op.drop_index('ix_chats_user_id_created_at', table_name='chats')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_chats_user_id_created_at', 'chats', ['user_id', 'created_at', 'id'], unique=False)
+    op.drop_index('ix_chats_user_id_updated_at', table_name='chats')
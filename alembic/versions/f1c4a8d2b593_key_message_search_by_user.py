@@ -0,0 +1,92 @@
+"""Key message search index by user and a stable id
+
+Revision ID: f1c4a8d2b593
+Revises: e8b2f6a4c371
+Create Date: 2026-10-17 18:41:09.532610
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c4a8d2b593'
+down_revision: Union[str, None] = 'e8b2f6a4c371'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def drop_sqlite_search_index() -> None:
+    op.execute("DROP TRIGGER IF EXISTS messages_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS messages_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS messages_fts_ai")
+    op.execute("DROP TABLE IF EXISTS messages_fts")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        drop_sqlite_search_index()
+        # messages_fts_ids.rowid is an INTEGER PRIMARY KEY, so unlike the
+        # implicit rowid of messages it is not renumbered by VACUUM. Keys are
+        # (user_id << 32) + n, so each user's messages are one rowid range of
+        # the FTS table and searches seek straight to it.
+        op.execute("""CREATE TABLE messages_fts_ids (
+            rowid INTEGER PRIMARY KEY,
+            message_id VARCHAR NOT NULL UNIQUE
+        )""")
+        op.execute("CREATE VIRTUAL TABLE messages_fts USING fts5(content, prefix='2 3')")
+        op.execute("""CREATE TRIGGER messages_fts_ai AFTER INSERT ON messages BEGIN
+            INSERT INTO messages_fts_ids(rowid, message_id)
+            SELECT COALESCE(
+                (SELECT i.rowid FROM messages_fts_ids i
+                 WHERE i.rowid BETWEEN c.user_id << 32 AND (c.user_id << 32) + 4294967295
+                 ORDER BY i.rowid DESC LIMIT 1),
+                c.user_id << 32
+            ) + 1, new.id
+            FROM chats c WHERE c.id = new.chat_id;
+            INSERT INTO messages_fts(rowid, content)
+            SELECT rowid, new.content FROM messages_fts_ids WHERE message_id = new.id;
+        END""")
+        op.execute("""CREATE TRIGGER messages_fts_ad AFTER DELETE ON messages BEGIN
+            DELETE FROM messages_fts WHERE rowid = (SELECT rowid FROM messages_fts_ids WHERE message_id = old.id);
+            DELETE FROM messages_fts_ids WHERE message_id = old.id;
+        END""")
+        op.execute("""CREATE TRIGGER messages_fts_au AFTER UPDATE OF content ON messages BEGIN
+            UPDATE messages_fts SET content = new.content
+            WHERE rowid = (SELECT rowid FROM messages_fts_ids WHERE message_id = new.id);
+        END""")
+        # Index the existing messages
+        op.execute("""INSERT INTO messages_fts_ids(rowid, message_id)
+            SELECT (c.user_id << 32) + ROW_NUMBER() OVER (PARTITION BY c.user_id ORDER BY m.timestamp, m.id), m.id
+            FROM messages m
+            JOIN chats c ON c.id = m.chat_id""")
+        op.execute("""INSERT INTO messages_fts(rowid, content)
+            SELECT i.rowid, m.content
+            FROM messages_fts_ids i
+            JOIN messages m ON m.id = i.message_id""")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        drop_sqlite_search_index()
+        op.execute("DROP TABLE IF EXISTS messages_fts_ids")
+        op.execute("CREATE VIRTUAL TABLE messages_fts USING fts5(content, content='messages', content_rowid='rowid')")
+        op.execute("""CREATE TRIGGER messages_fts_ai AFTER INSERT ON messages BEGIN
+            INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content);
+        END""")
+        op.execute("""CREATE TRIGGER messages_fts_ad AFTER DELETE ON messages BEGIN
+            INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+        END""")
+        op.execute("""CREATE TRIGGER messages_fts_au AFTER UPDATE OF content ON messages BEGIN
+            INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+            INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content);
+        END""")
+        op.execute("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')")
@@ -1,47 +1,63 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Response, status, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from app.database import get_db
 from app.schemas.chat import ChatCreate, Chat, ChatUpdate
 from app.models.chat import Chat as ChatModel
 from app.models.user import User as UserModel
 from app.core.dependencies import get_current_user
+from app.core.pagination import keyset_page, set_cursor_headers
 
 router = APIRouter()
 
 @router.post("/", response_model=Chat)
-def create_chat(
+async def create_chat(
     chat: ChatCreate,
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     db_chat = ChatModel(
         title=chat.title,
         user_id=current_user.id
     )
     db.add(db_chat)
-    db.commit()
-    db.refresh(db_chat)
+    await db.commit()
+    await db.refresh(db_chat)
     return db_chat
 
 @router.get("/", response_model=List[Chat])
-def get_user_chats(
+async def get_user_chats(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[str] = Query(None, description="X-Cursor-Before of a page; returns chats last active earlier"),
+    after: Optional[str] = Query(None, description="X-Cursor-After of a page; returns chats last active later"),
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    chats = db.query(ChatModel).filter(ChatModel.user_id == current_user.id).order_by(ChatModel.created_at.desc()).all()
+    chats = await keyset_page(
+        db,
+        select(ChatModel).where(ChatModel.user_id == current_user.id),
+        ChatModel,
+        ChatModel.updated_at,
+        limit,
+        before=before,
+        after=after,
+        newest_first=True
+    )
+    set_cursor_headers(response, chats, ChatModel.updated_at, newest_first=True)
     return chats
 
 @router.get("/{chat_id}", response_model=Chat)
-def get_chat(
+async def get_chat(
     chat_id: str,
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    chat = db.query(ChatModel).filter(
+    chat = await db.scalar(select(ChatModel).where(
         ChatModel.id == chat_id,
         ChatModel.user_id == current_user.id
-    ).first()
+    ))
     
     if not chat:
         raise HTTPException(
@@ -52,16 +68,16 @@ def get_chat(
     return chat
 
 @router.put("/{chat_id}", response_model=Chat)
-def update_chat(
+async def update_chat(
     chat_id: str,
     chat_update: ChatUpdate,
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    chat = db.query(ChatModel).filter(
+    chat = await db.scalar(select(ChatModel).where(
         ChatModel.id == chat_id,
         ChatModel.user_id == current_user.id
-    ).first()
+    ))
     
     if not chat:
         raise HTTPException(
@@ -72,20 +88,20 @@ def update_chat(
     if chat_update.title is not None:
         chat.title = chat_update.title
     
-    db.commit()
-    db.refresh(chat)
+    await db.commit()
+    await db.refresh(chat)
     return chat
 
 @router.delete("/{chat_id}")
-def delete_chat(
+async def delete_chat(
     chat_id: str,
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    chat = db.query(ChatModel).filter(
+    chat = await db.scalar(select(ChatModel).where(
         ChatModel.id == chat_id,
         ChatModel.user_id == current_user.id
-    ).first()
+    ))
     
     if not chat:
         raise HTTPException(
@@ -93,7 +109,7 @@ def delete_chat(
             detail="Chat not found"
         )
     
-    db.delete(chat)
-    db.commit()
+    await db.delete(chat)
+    await db.commit()
     
     return {"message": "Chat deleted successfully"}
\ No newline at end of file
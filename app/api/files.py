@@ -1,20 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Awaitable, BinaryIO, List, Dict, Optional, Tuple
+from datetime import datetime, timezone
+from functools import partial
+import asyncio
+import hashlib
 import os
 import uuid
 from pathlib import Path
-import PyPDF2
-from docx import Document
-import speech_recognition as sr
-from pydub import AudioSegment
-import tempfile
-import io
-
-from app.database import get_db
+
+from app.database import get_db, AsyncSessionLocal
 from app.models.user import User as UserModel
-from app.core.dependencies import get_current_user
-from app.services.ai_service import ai_service
+from app.models.file_job import FileJob as FileJobModel
+from app.schemas.file_job import FileJob
+from app.core.config import settings
+from app.core.dependencies import get_current_user, limit_uploads
+from app.core.sse import sse_event
+from app.services.ai_service import ai_service, AIServiceError
+from app.services.document_cache import get_cached_document, store_cached_document
+from app.services.context_builder import estimate_tokens
+from app.services.job_queue import file_job_queue, TERMINAL_STATUSES
+from app.services.extraction import (
+    ExtractionError,
+    ExtractionTimeout,
+    ExtractorPoolFull,
+    extract_word_text,
+    extractor_pool,
+    transcribe_audio,
+)
 
 router = APIRouter()
 
@@ -22,188 +38,347 @@ router = APIRouter()
 UPLOADS_DIR = Path("uploads")
 UPLOADS_DIR.mkdir(exist_ok=True)
 
-@router.post("/upload")
+# Sections of the AI analysis returned for uploaded documents
+DOCUMENT_REPORT_SECTIONS = """1. **Document Summary**: Brief overview of the document
+2. **Key Points**: Main legal and financial points
+3. **Potential Risks**: Any legal or financial risks identified
+4. **Recommendations**: Suggested actions or considerations
+5. **Important Clauses**: Critical terms and conditions to note"""
+
+# Prefix of the job error recorded when the AI analysis fails
+ANALYSIS_UNAVAILABLE = "AI analysis unavailable"
+
+# Uploads are limited to 10MB and copied to disk in 1MB chunks
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# How often job event streams re-check the database for status changes
+JOB_EVENTS_POLL_SECONDS = 15
+
+# Retry-After hint returned when the processing queue is full
+QUEUE_FULL_RETRY_AFTER_SECONDS = 30
+
+@router.post("/upload", status_code=status.HTTP_202_ACCEPTED)
 async def upload_file(
     file: UploadFile = File(...),
-    current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserModel = Depends(limit_uploads),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Upload and process files (PDF, Word, Audio)"""
+    """Upload a file (PDF, Word, Audio) and queue it for processing"""
+    
+    # Reject early while the processing queue is saturated, or while more
+    # files are queued or being extracted than the extractor pool admits
+    if file_job_queue.full() or extractor_pool.backlog_full(file_job_queue.qsize()):
+        raise queue_full_error()
     
-    # Check file size (max 10MB)
-    if file.size > 10 * 1024 * 1024:
+    # Check file size (max 10MB) when the client declared it
+    if file.size is not None and file.size > MAX_UPLOAD_SIZE:
+        raise upload_too_large_error()
+    
+    file_extension = Path(file.filename).suffix.lower()
+    file_type = get_file_type(file_extension)
+    if file_type is None:
         raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail="File size too large. Maximum 10MB allowed."
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unsupported file type. Supported: PDF, Word, Audio (WAV, MP3), Images"
         )
     
     # Generate unique filename
-    file_extension = Path(file.filename).suffix.lower()
     unique_filename = f"{uuid.uuid4()}{file_extension}"
     file_path = UPLOADS_DIR / unique_filename
     
+    # Stream file to disk in chunks; size is enforced while copying since
+    # chunked requests do not declare it up front
     try:
-        # Save file
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
-        
-        # Process file based on type
-        processed_content = ""
-        file_type = ""
-        
-        if file_extension == ".pdf":
-            processed_content = extract_pdf_text(file_path)
-            file_type = "PDF Document"
-        elif file_extension in [".doc", ".docx"]:
-            processed_content = extract_word_text(file_path)
-            file_type = "Word Document"
-        elif file_extension in [".wav", ".mp3", ".m4a", ".ogg"]:
-            processed_content = transcribe_audio(file_path)
-            file_type = "Audio Recording"
-        elif file_extension in [".jpg", ".jpeg", ".png", ".gif"]:
-            processed_content = "Image uploaded successfully. Please describe what you'd like me to analyze about this image."
-            file_type = "Image"
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Unsupported file type. Supported: PDF, Word, Audio (WAV, MP3), Images"
-            )
-        
-        # Generate AI analysis if content was extracted
-        ai_analysis = ""
-        if processed_content and file_type in ["PDF Document", "Word Document"]:
-            ai_analysis = await analyze_document_with_ai(processed_content, file_type)
-        elif file_type == "Audio Recording":
-            ai_analysis = await analyze_audio_content_with_ai(processed_content)
-        
-        # Clean up file after processing
+        size, content_hash = await run_in_threadpool(save_upload, file.file, file_path, MAX_UPLOAD_SIZE)
+    except UploadTooLarge:
+        raise upload_too_large_error()
+    
+    # Repeat uploads of the same file are answered from the document cache
+    cached = await get_cached_document(db, current_user.id, content_hash, file_type)
+    if cached is not None:
         os.remove(file_path)
+        job = FileJobModel(
+            user_id=current_user.id,
+            filename=file.filename,
+            file_type=file_type,
+            size=size,
+            status="completed",
+            content=cached.content,
+            ai_analysis=cached.ai_analysis,
+            completed_at=datetime.now(timezone.utc)
+        )
+        db.add(job)
+        await db.commit()
         
         return {
             "success": True,
             "data": {
-                "filename": file.filename,
+                "job_id": job.id,
+                "status": job.status,
+                "filename": job.filename,
                 "file_type": file_type,
-                "content": processed_content,
-                "ai_analysis": ai_analysis,
-                "size": file.size
+                "content": job.content,
+                "ai_analysis": job.ai_analysis,
+                "cached": True
             }
         }
-        
-    except Exception as e:
-        # Clean up file if error occurs
-        if file_path.exists():
-            os.remove(file_path)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error processing file: {str(e)}"
-        )
-
-def extract_pdf_text(file_path: Path) -> str:
-    """Extract text from PDF file"""
+    
+    job = FileJobModel(
+        user_id=current_user.id,
+        filename=file.filename,
+        file_type=file_type,
+        size=size,
+        status="queued",
+        worker_id=file_job_queue.worker_id,
+        heartbeat_at=datetime.now(timezone.utc)
+    )
+    db.add(job)
+    await db.commit()
+    
     try:
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            return text.strip()
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Error reading PDF: {str(e)}"
+        file_job_queue.submit(
+            job.id,
+            partial(process_file, file_path, file_type, current_user.id, content_hash, size)
         )
+    except asyncio.QueueFull:
+        await db.delete(job)
+        await db.commit()
+        os.remove(file_path)
+        raise queue_full_error()
+    
+    return {
+        "success": True,
+        "data": {
+            "job_id": job.id,
+            "status": job.status,
+            "filename": job.filename,
+            "file_type": file_type
+        }
+    }
 
-def extract_word_text(file_path: Path) -> str:
-    """Extract text from Word document"""
-    try:
-        doc = Document(file_path)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text.strip()
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Error reading Word document: {str(e)}"
-        )
+@router.get("/jobs/{job_id}")
+async def get_file_job(
+    job_id: str,
+    current_user: UserModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the status and result of a file processing job"""
+    job = await get_user_job(db, job_id, current_user.id)
+    return {
+        "success": True,
+        "data": FileJob.model_validate(job)
+    }
 
-def transcribe_audio(file_path: Path) -> str:
-    """Transcribe audio to text"""
-    try:
-        # Convert audio to WAV format if needed
-        audio = AudioSegment.from_file(file_path)
+@router.get("/jobs/{job_id}/events")
+async def file_job_events(
+    job_id: str,
+    current_user: UserModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream job status changes as Server-Sent Events until the job finishes"""
+    job = await get_user_job(db, job_id, current_user.id)
+    initial = FileJob.model_validate(job).model_dump(mode="json")
+    user_id = current_user.id
+    
+    async def event_stream():
+        if initial["status"] in TERMINAL_STATUSES:
+            yield sse_event(initial, event="done")
+            return
+        
+        status_value = initial["status"]
+        yield sse_event({"job_id": job_id, "status": status_value}, event="status")
         
-        # Create temporary WAV file
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_wav:
-            audio.export(temp_wav.name, format="wav")
+        while True:
+            await file_job_queue.wait(job_id, JOB_EVENTS_POLL_SECONDS)
             
-            # Transcribe audio
-            recognizer = sr.Recognizer()
-            with sr.AudioFile(temp_wav.name) as source:
-                audio_data = recognizer.record(source)
-                text = recognizer.recognize_google(audio_data, language='uz-UZ')
+            # Re-read from the database so jobs run by other workers are seen too
+            async with AsyncSessionLocal() as poll_db:
+                current = await get_user_job(poll_db, job_id, user_id)
             
-            # Clean up temporary file
-            os.unlink(temp_wav.name)
+            if current.status in TERMINAL_STATUSES:
+                yield sse_event(
+                    FileJob.model_validate(current).model_dump(mode="json"),
+                    event="done"
+                )
+                return
             
-            return text
-    except sr.UnknownValueError:
-        return "Audio was not clear enough to transcribe. Please try recording again."
-    except sr.RequestError as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Speech recognition service error: {str(e)}"
-        )
-    except Exception as e:
+            if current.status != status_value:
+                status_value = current.status
+                yield sse_event({"job_id": job_id, "status": status_value}, event="status")
+            else:
+                # Keep idle connections open through proxies
+                yield ": keep-alive\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+class UploadTooLarge(Exception):
+    pass
+
+def save_upload(source: BinaryIO, file_path: Path, max_size: int) -> Tuple[int, str]:
+    """Copy an upload to disk in chunks, returning its size and sha256 digest"""
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        with open(file_path, "wb") as f:
+            while True:
+                chunk = source.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge()
+                digest.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        # Never leave partial uploads behind
+        if file_path.exists():
+            os.remove(file_path)
+        raise
+    return size, digest.hexdigest()
+
+def upload_too_large_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail="File size too large. Maximum 10MB allowed."
+    )
+
+def queue_full_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many files are being processed. Please try again later.",
+        headers={"Retry-After": str(QUEUE_FULL_RETRY_AFTER_SECONDS)}
+    )
+
+async def get_user_job(db: AsyncSession, job_id: str, user_id: int) -> FileJobModel:
+    job = await db.scalar(select(FileJobModel).where(
+        FileJobModel.id == job_id,
+        FileJobModel.user_id == user_id
+    ))
+    
+    if not job:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Error transcribing audio: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
         )
+    
+    return job
 
-async def analyze_document_with_ai(content: str, file_type: str) -> str:
-    """Analyze document content with AI"""
+def get_file_type(file_extension: str) -> Optional[str]:
+    """Map a file extension to a supported file type"""
+    if file_extension == ".pdf":
+        return "PDF Document"
+    if file_extension in [".doc", ".docx"]:
+        return "Word Document"
+    if file_extension in [".wav", ".mp3", ".m4a", ".ogg"]:
+        return "Audio Recording"
+    if file_extension in [".jpg", ".jpeg", ".png", ".gif"]:
+        return "Image"
+    return None
+
+async def process_file(
+    file_path: Path,
+    file_type: str,
+    user_id: int,
+    content_hash: str,
+    size: int
+) -> Dict[str, str]:
+    """Extract content from a saved upload, analyze it with AI and cache the result"""
+    try:
+        # Process file based on type
+        processed_content = ""
+        
+        if file_type == "PDF Document":
+            processed_content = await run_extractor(extractor_pool.extract_pdf_text(file_path))
+        elif file_type == "Word Document":
+            processed_content = await run_extractor(extractor_pool.run(extract_word_text, file_path))
+        elif file_type == "Audio Recording":
+            processed_content = await run_extractor(extractor_pool.run(transcribe_audio, file_path))
+        elif file_type == "Image":
+            processed_content = "Image uploaded successfully. Please describe what you'd like me to analyze about this image."
+        
+        # Generate AI analysis if content was extracted; if the AI service
+        # fails the extracted content is still returned
+        ai_analysis = ""
+        analysis_error = None
+        try:
+            if processed_content and file_type in ["PDF Document", "Word Document"]:
+                ai_analysis = await analyze_document_with_ai(processed_content, file_type)
+            elif file_type == "Audio Recording":
+                ai_analysis = await analyze_audio_content_with_ai(processed_content)
+        except AIServiceError as e:
+            ai_analysis = None
+            analysis_error = f"{ANALYSIS_UNAVAILABLE}: {e.detail}"
+        
+        # Images need no processing; failed AI analyses should be retried
+        if file_type != "Image" and is_analysis_available(ai_analysis):
+            await store_cached_document(
+                user_id, content_hash, file_type, size, processed_content, ai_analysis
+            )
+        
+        return {
+            "content": processed_content,
+            "ai_analysis": ai_analysis,
+            "error": analysis_error
+        }
+    finally:
+        # Clean up file after processing
+        if file_path.exists():
+            os.remove(file_path)
+
+def is_analysis_available(ai_analysis: Optional[str]) -> bool:
+    """AI failures leave no analysis, and must not be cached"""
+    return ai_analysis is not None
+
+async def run_extractor(extraction: Awaitable[str]) -> str:
+    """Await an extractor pool call, mapping its errors to HTTP errors"""
     try:
-        prompt = f"""
+        return await extraction
+    except ExtractionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except ExtractorPoolFull as e:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
+    except ExtractionTimeout as e:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(e))
+
+async def analyze_document_with_ai(content: str, file_type: str) -> str:
+    """Analyze document content with AI, raising AIServiceError on failure"""
+    # Long documents are analyzed clause by clause instead of truncated
+    if estimate_tokens(content) > settings.document_chunk_tokens:
+        return await ai_service.analyze_long_document(content, file_type, DOCUMENT_REPORT_SECTIONS)
+    
+    prompt = f"""
 You are a legal and financial expert. Analyze the following {file_type} content and provide:
 
-1. **Document Summary**: Brief overview of the document
-2. **Key Points**: Main legal and financial points
-3. **Potential Risks**: Any legal or financial risks identified
-4. **Recommendations**: Suggested actions or considerations
-5. **Important Clauses**: Critical terms and conditions to note
+{DOCUMENT_REPORT_SECTIONS}
 
 Document Content:
-{content[:4000]}  # Limit content to avoid token limits
+{content}
 
 Provide your analysis in a clear, structured format.
 """
-        
-        messages = [{"role": "user", "content": prompt}]
-        analysis = await ai_service.generate_response(messages)
-        return analysis
-        
-    except Exception as e:
-        return f"AI analysis unavailable: {str(e)}"
+    
+    messages = [{"role": "user", "content": prompt}]
+    analysis = await ai_service.generate_response(messages)
+    return analysis
 
 async def analyze_audio_content_with_ai(transcribed_text: str) -> str:
-    """Analyze transcribed audio content with AI"""
-    try:
-        prompt = f"""
+    """Analyze transcribed audio content with AI, raising AIServiceError on failure"""
+    prompt = f"""
 You are a legal and financial expert. The user has sent a voice message that was transcribed to:
 
 "{transcribed_text}"
 
 Provide a helpful response addressing their legal or financial question or concern. If the transcription seems unclear, ask for clarification.
 """
-        
-        messages = [{"role": "user", "content": prompt}]
-        analysis = await ai_service.generate_response(messages)
-        return analysis
-        
-    except Exception as e:
-        return f"AI analysis unavailable: {str(e)}"
+    
+    messages = [{"role": "user", "content": prompt}]
+    analysis = await ai_service.generate_response(messages)
+    return analysis
 
 @router.post("/text-to-speech")
 async def text_to_speech(
@@ -1,27 +1,79 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
-from app.schemas.message import MessageCreate, Message
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Optional
+from datetime import datetime, timezone
+import math
+from app.database import get_db, AsyncSessionLocal
+from app.schemas.message import MessageCreate, Message, MessageSearchResult
 from app.models.message import Message as MessageModel
 from app.models.chat import Chat as ChatModel
+from app.models.chat_summary import ChatSummary
 from app.models.user import User as UserModel
-from app.core.dependencies import get_current_user
-from app.services.ai_service import ai_service
+from app.core.dependencies import get_current_user, limit_ai_requests
+from app.core.config import settings
+from app.core.sse import sse_event
+from app.core.pagination import keyset_page, set_cursor_headers
+from app.services.ai_service import ai_service, AIServiceError
+from app.services.context_builder import build_context
+from app.services.summary_service import after_summary, update_chat_summary
+from app.services.message_search import search_messages
 
 router = APIRouter()
 
+def ai_unavailable_error(error: AIServiceError) -> HTTPException:
+    """503 for AI failures; nothing is saved, so the client can simply retry"""
+    print(f"AI Service Error: {error}")
+    headers = None
+    if error.retry_after:
+        headers = {"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="AI service is currently unavailable, please try again later",
+        headers=headers
+    )
+
+async def build_messages_for_ai(db: AsyncSession, chat_id: str, content: str) -> List[Dict[str, str]]:
+    """Build the message list sent to the AI for a new user message"""
+    # Older turns are represented by the rolling summary, if one exists
+    summary = await db.get(ChatSummary, chat_id)
+    
+    # Get the most recent chat history not covered by the summary
+    recent_messages = (await db.scalars(
+        select(MessageModel).where(
+            MessageModel.chat_id == chat_id,
+            after_summary(summary)
+        ).order_by(MessageModel.timestamp.desc(), MessageModel.id.desc()).limit(settings.context_history_limit)
+    )).all()
+    
+    # Format messages for AI in chronological order
+    history = []
+    for msg in reversed(recent_messages):
+        history.append({
+            "role": msg.role,
+            "content": msg.content
+        })
+    
+    return build_context(
+        history,
+        {"role": "user", "content": content},
+        ai_service.model,
+        summary=summary.summary if summary else None
+    )
+
 @router.post("/", response_model=Message)
 async def send_message(
     message: MessageCreate,
-    current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks,
+    current_user: UserModel = Depends(limit_ai_requests),
+    db: AsyncSession = Depends(get_db)
 ):
     # Verify chat belongs to user
-    chat = db.query(ChatModel).filter(
+    chat = await db.scalar(select(ChatModel).where(
         ChatModel.id == message.chat_id,
         ChatModel.user_id == current_user.id
-    ).first()
+    ))
     
     if not chat:
         raise HTTPException(
@@ -29,61 +81,160 @@ async def send_message(
             detail="Chat not found"
         )
     
-    # Save user message
+    messages_for_ai = await build_messages_for_ai(db, message.chat_id, message.content)
+    
+    # End the read transaction so no connection is held during the AI call
+    await db.commit()
+    
+    # Timestamps are set here rather than by the database so the turn is
+    # ordered correctly and nothing has to be read back after the commit
     user_message = MessageModel(
         chat_id=message.chat_id,
         content=message.content,
-        role="user"
+        role="user",
+        timestamp=datetime.now(timezone.utc)
     )
-    db.add(user_message)
-    db.commit()
-    db.refresh(user_message)
-    
-    # Get chat history for context
-    chat_messages = db.query(MessageModel).filter(
-        MessageModel.chat_id == message.chat_id
-    ).order_by(MessageModel.timestamp.asc()).limit(10).all()
-    
-    # Format messages for AI
-    messages_for_ai = []
-    for msg in chat_messages:
-        messages_for_ai.append({
-            "role": msg.role,
-            "content": msg.content
-        })
-    
-    # Add current user message
-    messages_for_ai.append({
-        "role": "user",
-        "content": message.content
-    })
     
-    # Get AI response using Novita AI
-    ai_response = await ai_service.generate_response(messages_for_ai)
+    # Get AI response; on failure neither message is saved
+    try:
+        ai_response = await ai_service.generate_response(messages_for_ai)
+    except AIServiceError as e:
+        raise ai_unavailable_error(e)
     
-    # Save AI response
     ai_message = MessageModel(
         chat_id=message.chat_id,
         content=ai_response,
-        role="assistant"
+        role="assistant",
+        timestamp=datetime.now(timezone.utc)
     )
-    db.add(ai_message)
-    db.commit()
-    db.refresh(ai_message)
+    
+    # Both messages and the chat's activity time are written in one transaction
+    chat.updated_at = ai_message.timestamp
+    db.add_all([user_message, ai_message])
+    await db.commit()
+    
+    # Keep the rolling summary up to date without delaying the reply
+    background_tasks.add_task(update_chat_summary, message.chat_id)
     
     return ai_message
 
+@router.post("/stream")
+async def stream_message(
+    message: MessageCreate,
+    background_tasks: BackgroundTasks,
+    current_user: UserModel = Depends(limit_ai_requests),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Send a message and stream the AI reply as Server-Sent Events
+    """
+    # Verify chat belongs to user
+    chat = await db.scalar(select(ChatModel).where(
+        ChatModel.id == message.chat_id,
+        ChatModel.user_id == current_user.id
+    ))
+    
+    if not chat:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat not found"
+        )
+    
+    messages_for_ai = await build_messages_for_ai(db, message.chat_id, message.content)
+    await db.commit()
+    
+    # Wait for the first delta so an unavailable AI service is reported as
+    # a 503 before anything is saved
+    deltas = ai_service.stream_response(messages_for_ai)
+    try:
+        first_delta = await deltas.__anext__()
+    except StopAsyncIteration:
+        first_delta = ""
+    except AIServiceError as e:
+        raise ai_unavailable_error(e)
+    
+    # Save user message before streaming so it is kept if the client disconnects
+    user_message = MessageModel(
+        chat_id=message.chat_id,
+        content=message.content,
+        role="user",
+        timestamp=datetime.now(timezone.utc)
+    )
+    db.add(user_message)
+    await db.commit()
+    
+    chat_id = message.chat_id
+    
+    # Runs once the stream has been fully sent
+    background_tasks.add_task(update_chat_summary, chat_id)
+    
+    async def event_stream():
+        parts = []
+        try:
+            if first_delta:
+                parts.append(first_delta)
+                yield sse_event({"delta": first_delta})
+            async for delta in deltas:
+                parts.append(delta)
+                yield sse_event({"delta": delta})
+        except Exception as e:
+            print(f"AI Service Error: {e}")
+            yield sse_event({"detail": "AI service is currently unavailable"}, event="error")
+            return
+        
+        # Save AI response once the stream has finished; the request session
+        # may already be closed at this point, so use a dedicated one
+        async with AsyncSessionLocal() as stream_db:
+            ai_message = MessageModel(
+                chat_id=chat_id,
+                content="".join(parts),
+                role="assistant",
+                timestamp=datetime.now(timezone.utc)
+            )
+            stream_db.add(ai_message)
+            await stream_db.execute(
+                update(ChatModel).where(ChatModel.id == chat_id).values(updated_at=ai_message.timestamp)
+            )
+            await stream_db.commit()
+        yield sse_event(
+            Message.model_validate(ai_message).model_dump(mode="json"),
+            event="done"
+        )
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/search", response_model=List[MessageSearchResult])
+async def search_user_messages(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: UserModel = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Full-text search across all of the user's chat messages, best match first
+    """
+    return await search_messages(db, current_user.id, q, limit, offset)
+
 @router.get("/{chat_id}", response_model=List[Message])
-def get_chat_messages(
+async def get_chat_messages(
     chat_id: str,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[str] = Query(None, description="X-Cursor-Before of a page; returns older messages"),
+    after: Optional[str] = Query(None, description="X-Cursor-After of a page; returns newer messages"),
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Verify chat belongs to user
-    chat = db.query(ChatModel).filter(
+    chat = await db.scalar(select(ChatModel).where(
         ChatModel.id == chat_id,
         ChatModel.user_id == current_user.id
-    ).first()
+    ))
     
     if not chat:
         raise HTTPException(
@@ -91,23 +242,32 @@ def get_chat_messages(
             detail="Chat not found"
         )
     
-    messages = db.query(MessageModel).filter(
-        MessageModel.chat_id == chat_id
-    ).order_by(MessageModel.timestamp.asc()).all()
-    
+    # Pages are returned in chronological order; without a cursor this is
+    # the most recent page of the conversation
+    messages = await keyset_page(
+        db,
+        select(MessageModel).where(MessageModel.chat_id == chat_id),
+        MessageModel,
+        MessageModel.timestamp,
+        limit,
+        before=before,
+        after=after,
+        newest_first=False
+    )
+    set_cursor_headers(response, messages, MessageModel.timestamp, newest_first=False)
     return messages
 
 @router.delete("/{message_id}")
-def delete_message(
+async def delete_message(
     message_id: str,
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Get message and verify ownership through chat
-    message = db.query(MessageModel).join(ChatModel).filter(
+    message = await db.scalar(select(MessageModel).join(ChatModel).where(
         MessageModel.id == message_id,
         ChatModel.user_id == current_user.id
-    ).first()
+    ))
     
     if not message:
         raise HTTPException(
@@ -115,16 +275,16 @@ def delete_message(
             detail="Message not found"
         )
     
-    db.delete(message)
-    db.commit()
+    await db.delete(message)
+    await db.commit()
     
     return {"message": "Message deleted successfully"}
 
 @router.post("/analyze-contract")
 async def analyze_contract(
     contract_data: dict,
-    current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserModel = Depends(limit_ai_requests),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Analyze financial contracts for risks and issues
@@ -145,6 +305,8 @@ async def analyze_contract(
             "analysis": analysis,
             "contract_type": contract_type
         }
+    except AIServiceError as e:
+        raise ai_unavailable_error(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -154,8 +316,8 @@ async def analyze_contract(
 @router.post("/detect-fraud")
 async def detect_fraud(
     fraud_data: dict,
-    current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserModel = Depends(limit_ai_requests),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Analyze potential financial fraud or scam
@@ -174,6 +336,8 @@ async def detect_fraud(
             "success": True,
             "fraud_analysis": fraud_analysis
         }
+    except AIServiceError as e:
+        raise ai_unavailable_error(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -183,8 +347,8 @@ async def detect_fraud(
 @router.post("/generate-template")
 async def generate_template(
     template_data: dict,
-    current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserModel = Depends(limit_ai_requests),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Generate legal document templates
@@ -205,6 +369,8 @@ async def generate_template(
             "template": template,
             "document_type": document_type
         }
+    except AIServiceError as e:
+        raise ai_unavailable_error(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -214,8 +380,8 @@ async def generate_template(
 @router.post("/financial-education")
 async def financial_education(
     education_data: dict,
-    current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserModel = Depends(limit_ai_requests),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Provide financial education and explanations
@@ -235,6 +401,8 @@ async def financial_education(
             "education_content": education_content,
             "topic": topic
         }
+    except AIServiceError as e:
+        raise ai_unavailable_error(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,18 +1,146 @@
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Dict, Optional
 import os
 
+class AIProvider(BaseModel):
+    """One OpenAI-compatible backend in AI_PROVIDERS"""
+    name: str
+    base_url: str
+    api_key: Optional[str] = None  # defaults to ai_api_key
+    model: str
+    weight: float = Field(1.0, gt=0)
+
 class Settings(BaseSettings):
     # Database
     database_url: str = "sqlite:///./fin_jurist.db"
+    async_database_url: Optional[str] = None  # derived from database_url when unset
+    
+    # Database connection pool (not used for in-memory SQLite)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 30 * 60
+    db_pool_pre_ping: bool = True
+    
+    # SQLite pragmas applied to every new connection
+    sqlite_journal_mode: str = "wal"
+    sqlite_synchronous: str = "normal"
+    sqlite_busy_timeout_ms: int = 5000
     
     # Security
     secret_key: str = "your-secret-key-here-change-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     
+    # Password hashing (bcrypt cost; existing hashes are upgraded on login)
+    password_hash_rounds: int = 12
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 64
+    
+    # Cache of authenticated users, saves a users lookup per request
+    user_cache_enabled: bool = True
+    user_cache_ttl_seconds: int = 60
+    user_cache_max_entries: int = 10000
+    
     # AI API
     ai_api_url: str = "https://fa7d-37-110-210-177.ngrok-free.app/ask"
+    ai_base_url: str = "https://api.novita.ai/v3/openai"
+    ai_api_key: str = "sk_6x6NBoPSjoJCAUKe9iUVZZkgvsslVVphmcWY4C2S5YY"
+    ai_model: str = "deepseek/deepseek-v3-0324"
+    ai_max_tokens: int = 1000
+    
+    # Provider router; a JSON list of {"name", "base_url", "api_key", "model",
+    # "weight"}. When empty the single ai_base_url/ai_model provider is used.
+    # Slow completions are hedged on a second provider after the first one's
+    # observed p95 latency (or the initial delay until enough samples exist).
+    ai_providers: List[AIProvider] = []
+    ai_hedge_enabled: bool = True
+    ai_hedge_percentile: float = 0.95
+    ai_hedge_initial_delay_seconds: float = 10.0
+    ai_hedge_min_delay_seconds: float = 1.0
+    
+    # Retries with jittered backoff, deadlines and per-provider circuit breaking
+    ai_max_attempts: int = 3
+    ai_attempt_timeout_seconds: float = 45.0
+    ai_deadline_seconds: float = 90.0
+    ai_retry_backoff_seconds: float = 0.5
+    ai_retry_backoff_max_seconds: float = 4.0
+    ai_circuit_failure_threshold: int = 5
+    ai_circuit_reset_seconds: float = 30.0
+    
+    # Chat context window (estimated tokens of history sent per turn)
+    context_token_budget: int = 3000
+    model_context_budgets: Dict[str, int] = {}
+    context_history_limit: int = 50
+    
+    # Rolling chat summaries
+    summary_enabled: bool = True
+    summary_interval_messages: int = 10
+    summary_keep_recent_messages: int = 6
+    summary_max_words: int = 200
+    summary_max_tokens: int = 400
+    
+    # Chunked analysis of long documents
+    document_chunk_tokens: int = 3000
+    document_analysis_concurrency: int = 4
+    
+    # AI HTTP client pool
+    ai_max_connections: int = 100
+    ai_max_keepalive_connections: int = 20
+    ai_keepalive_expiry: float = 30.0
+    ai_connect_timeout: float = 10.0
+    ai_request_timeout: float = 60.0
+    ai_max_concurrent_requests: int = 64
+    
+    # Concurrent identical AI requests share a single provider call
+    ai_single_flight_enabled: bool = True
+    
+    # AI response cache ("memory" or "sqlite" backend)
+    response_cache_enabled: bool = True
+    response_cache_backend: str = "memory"
+    response_cache_ttl_seconds: int = 24 * 60 * 60
+    response_cache_max_entries: int = 1000
+    response_cache_sqlite_path: str = "./response_cache.db"
+    
+    # Semantic near-duplicate question cache
+    semantic_cache_enabled: bool = False
+    semantic_cache_threshold: float = 0.9
+    semantic_cache_dimensions: int = 512
+    semantic_cache_max_entries: int = 10000
+    semantic_cache_ttl_seconds: int = 24 * 60 * 60
+    
+    # Rate limits on AI endpoints ("memory" or "sqlite" backend; 0 disables a limit)
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"
+    rate_limit_sqlite_path: str = "./rate_limit.db"
+    rate_limit_user_per_minute: float = 20
+    rate_limit_user_burst: int = 10
+    rate_limit_global_per_minute: float = 600
+    rate_limit_global_burst: int = 100
+    rate_limit_user_max_in_flight: int = 2
+    rate_limit_lease_seconds: float = 300.0
+    
+    # File processing jobs
+    file_job_workers: int = 4
+    file_job_max_queue: int = 100
+    # Workers refresh their active jobs' heartbeat; jobs whose heartbeat is
+    # older than file_job_stale_seconds belong to a dead worker
+    file_job_heartbeat_seconds: float = 30.0
+    file_job_stale_seconds: float = 120.0
+    # How often a job running in another worker is re-read while waiting on it
+    file_job_poll_seconds: float = 1.0
+    
+    # Document extraction pool ("process" or "thread"; 0 workers = CPU count)
+    extraction_pool_kind: str = "process"
+    extraction_workers: int = 0
+    extraction_timeout_seconds: float = 120.0
+    extraction_max_pending: int = 32
+    pdf_pages_per_shard: int = 16
+    
+    # Cache of processed uploads keyed by content hash
+    document_cache_enabled: bool = True
+    document_cache_max_entries: int = 5000
     
     # CORS
     allowed_origins: List[str] = ["http://localhost:3000", "http://127.0.0.1:3000"]
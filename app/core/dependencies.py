@@ -1,15 +1,20 @@
+from typing import AsyncIterator
+import math
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.core.security import verify_token
 from app.models.user import User
+from app.services.user_cache import user_cache
+from app.services.rate_limiter import RateLimitExceeded, rate_limiter
 
 security = HTTPBearer()
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     token = credentials.credentials
     user_id = verify_token(token)
@@ -21,7 +26,11 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    user = await user_cache.get(db, int(user_id)) if user_cache is not None else None
+    if user is not None:
+        return user
+    
+    user = await db.scalar(select(User).where(User.id == int(user_id)))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -35,4 +44,48 @@ def get_current_user(
             detail="Inactive user"
         )
     
-    return user
\ No newline at end of file
+    # Only active users are cached, so a hit can skip the checks above
+    if user_cache is not None:
+        user_cache.set(user)
+    
+    return user
+
+def rate_limited(limit_in_flight: bool = True):
+    """
+    Dependency factory that applies the AI rate limits to the current user
+
+    Resolves to the current user like get_current_user. With limit_in_flight
+    the user's in-flight slot is held until the response, including a
+    streamed one, has been sent.
+    """
+    async def dependency(current_user: User = Depends(get_current_user)) -> AsyncIterator[User]:
+        if rate_limiter is None:
+            yield current_user
+            return
+        
+        try:
+            lease_id = await rate_limiter.acquire(current_user.id, limit_in_flight)
+        except RateLimitExceeded as e:
+            detail = (
+                "Too many AI requests in progress, please wait for them to finish"
+                if e.reason == "in_flight"
+                else "Rate limit exceeded, please try again later"
+            )
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=detail,
+                headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+            )
+        
+        try:
+            yield current_user
+        finally:
+            await rate_limiter.release(current_user.id, lease_id)
+    
+    return dependency
+
+# AI endpoints answered within the request
+limit_ai_requests = rate_limited()
+
+# Uploads are analysed by a background job, so only the buckets apply
+limit_uploads = rate_limited(limit_in_flight=False)
@@ -0,0 +1,245 @@
+"""
+In-process metrics rendered in the Prometheus text format
+
+Observations are only recorded from the event loop thread (worker thread
+and process timings are measured by the coroutine awaiting them), so the
+counters are plain attribute updates with no locking.
+"""
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from bisect import bisect_left
+import math
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; covers fast API calls up to slow LLM completions
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> Iterator[Tuple[str, LabelValues, Sequence[str], float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for name, values, labelnames, value in self.samples():
+            lines.append(f"{name}{_format_labels(labelnames, values)} {_format_value(value)}")
+        return lines
+
+class Counter(Metric):
+    """Monotonically increasing value per label set"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        for key, value in self._values.items():
+            yield self.name, key, self.labelnames, value
+
+class Gauge(Metric):
+    """Value read from a callback at scrape time"""
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Dict[LabelValues, float]],
+        labelnames: Sequence[str] = ()
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def samples(self):
+        for key, value in self.callback().items():
+            yield self.name, key, self.labelnames, value
+
+class Histogram(Metric):
+    """Cumulative bucket counts, sum and count per label set"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            state = [0] * (len(self.buckets) + 1) + [0.0]
+            self._values[key] = state
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def samples(self):
+        bucket_labels = self.labelnames + ("le",)
+        for key, state in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), state[:-1]):
+                cumulative += count
+                yield f"{self.name}_bucket", key + (_format_value(bound),), bucket_labels, cumulative
+            yield f"{self.name}_sum", key, self.labelnames, state[-1]
+            yield f"{self.name}_count", key, self.labelnames, cumulative
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Dict[LabelValues, float]],
+        labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, callback, labelnames))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # One broken collector must not take down the whole scrape
+                print(f"Metrics error in {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+def register_cache_stats(
+    registry: "Registry",
+    prefix: str,
+    description: str,
+    stats: Callable[[], Optional[Dict[str, int]]]
+) -> None:
+    """Expose the hits, misses and entries of a cache's stats() as gauges"""
+    for field, documentation in (
+        ("hits", f"{description} hits since startup"),
+        ("misses", f"{description} misses since startup"),
+        ("entries", f"Entries in the {description.lower()}"),
+    ):
+        def collect(field: str = field) -> Dict[LabelValues, float]:
+            values = stats()
+            return {(): values[field]} if values else {}
+        registry.gauge(f"{prefix}_{field}", documentation, collect)
+
+# Global metrics registry
+registry = Registry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status")
+)
+
+ai_queue_wait = registry.histogram(
+    "ai_request_queue_wait_seconds",
+    "Time AI requests waited for a concurrency slot",
+    ("operation",)
+)
+ai_time_to_first_token = registry.histogram(
+    "ai_time_to_first_token_seconds",
+    "Time from sending a streaming AI request to its first text delta",
+    ("model",)
+)
+ai_request_duration = registry.histogram(
+    "ai_request_duration_seconds",
+    "Total AI provider request time",
+    ("operation", "provider", "model", "outcome")
+)
+ai_hedged_requests = registry.counter(
+    "ai_hedged_requests_total",
+    "AI requests hedged on a second provider, by which call answered first",
+    ("winner",)
+)
+ai_prompt_tokens = registry.counter(
+    "ai_prompt_tokens_total",
+    "Prompt tokens sent to the AI provider",
+    ("model",)
+)
+ai_completion_tokens = registry.counter(
+    "ai_completion_tokens_total",
+    "Completion tokens received from the AI provider",
+    ("model",)
+)
+ai_retries = registry.counter(
+    "ai_retries_total",
+    "AI calls retried after every available provider failed"
+)
+ai_coalesced_requests = registry.counter(
+    "ai_coalesced_requests_total",
+    "AI requests answered by an identical call already in flight",
+    ("model",)
+)
+
+rate_limit_rejections = registry.counter(
+    "rate_limit_rejections_total",
+    "Requests rejected by the AI rate limiter",
+    ("reason",)
+)
+
+extraction_duration = registry.histogram(
+    "extraction_duration_seconds",
+    "File extraction time by extractor",
+    ("extractor", "outcome")
+)
@@ -0,0 +1,106 @@
+from typing import Any, List, Optional, Tuple
+from datetime import datetime
+import base64
+import json
+from fastapi import HTTPException, Response, status
+from sqlalchemy import DateTime, Select, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+def encode_cursor(sort_value: Any, row_id: Any) -> str:
+    """Opaque cursor holding a row's sort value and id"""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, sort_column: Any) -> Tuple[Any, str]:
+    """Read the (sort value, id) pair back from a cursor, or raise a 400"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if isinstance(sort_column.type, DateTime):
+            sort_value = datetime.fromisoformat(sort_value)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return sort_value, row_id
+
+def keyset_query(
+    statement: Select,
+    model: Any,
+    sort_column: Any,
+    before: Optional[str] = None,
+    after: Optional[str] = None
+) -> Select:
+    """
+    Apply the keyset filter and ordering for one page of rows
+
+    Cursors carry the (sort value, id) of the row they were issued for, so
+    a page continues from where the previous one ended even if that row has
+    since been deleted or its sort value has changed, and each page is a
+    single index range scan. Rows are ordered oldest first when paging with
+    after, newest first otherwise.
+    """
+    if before and after:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either 'before' or 'after', not both"
+        )
+
+    id_column = model.id
+    if after:
+        anchor, anchor_id = decode_cursor(after, sort_column)
+        return statement.where(or_(
+            sort_column > anchor,
+            and_(sort_column == anchor, id_column > anchor_id)
+        )).order_by(sort_column.asc(), id_column.asc())
+
+    if before:
+        anchor, anchor_id = decode_cursor(before, sort_column)
+        statement = statement.where(or_(
+            sort_column < anchor,
+            and_(sort_column == anchor, id_column < anchor_id)
+        ))
+    return statement.order_by(sort_column.desc(), id_column.desc())
+
+async def keyset_page(
+    db: AsyncSession,
+    statement: Select,
+    model: Any,
+    sort_column: Any,
+    limit: int,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    newest_first: bool = True
+) -> List[Any]:
+    """
+    Fetch one page of at most limit rows ordered by (sort_column, id)
+
+    Without a cursor the newest rows are returned; before/after move to
+    older/newer rows. Rows come back newest first or oldest first as
+    requested.
+    """
+    statement = keyset_query(statement, model, sort_column, before=before, after=after)
+    rows = list((await db.scalars(statement.limit(limit))).all())
+
+    # Rows were fetched in the direction of travel; restore display order
+    fetched_newest_first = not after
+    if fetched_newest_first != newest_first:
+        rows.reverse()
+    return rows
+
+def set_cursor_headers(
+    response: Response,
+    rows: List[Any],
+    sort_column: Any,
+    newest_first: bool = True
+) -> None:
+    """Expose the cursors for the neighbouring pages"""
+    if not rows:
+        return
+
+    oldest, newest = (rows[-1], rows[0]) if newest_first else (rows[0], rows[-1])
+    response.headers["X-Cursor-Before"] = encode_cursor(getattr(oldest, sort_column.key), oldest.id)
+    response.headers["X-Cursor-After"] = encode_cursor(getattr(newest, sort_column.key), newest.id)
\ No newline at end of file
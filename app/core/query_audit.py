@@ -0,0 +1,150 @@
+"""
+Query plan audit for the hot ORM queries
+
+Runs EXPLAIN for the queries issued by the chat, message and file job
+endpoints and reports any that fall back to a full table scan or an extra
+sort. By default the schema is built from the models in an in-memory SQLite
+database; pass a database URL to audit a migrated database instead.
+
+    python -m app.core.query_audit [DATABASE_URL]
+
+Exits with status 1 if any query needs a table scan.
+"""
+from typing import Any, Callable, Dict, List, Tuple
+from datetime import datetime
+import re
+import sys
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session, sessionmaker
+from app.database import Base
+from app.core.pagination import encode_cursor, keyset_query
+from app.models.user import User
+from app.models.chat import Chat
+from app.models.message import Message
+from app.models.chat_summary import ChatSummary
+from app.models.file_job import FileJob
+from app.services.job_queue import file_job_queue
+from app.services.summary_service import after_summary
+
+# Sample parameters; plans do not depend on the rows existing
+USER_ID = 1
+CHAT_ID = "00000000-0000-0000-0000-000000000001"
+MESSAGE_ID = "00000000-0000-0000-0000-000000000002"
+JOB_ID = "00000000-0000-0000-0000-000000000003"
+CHAT_CURSOR = encode_cursor(datetime(2026, 1, 1), CHAT_ID)
+MESSAGE_CURSOR = encode_cursor(datetime(2026, 1, 1), MESSAGE_ID)
+
+SQLITE_TABLE_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)(\w+)(?!.* VIRTUAL TABLE)")
+SQLITE_SORT = re.compile(r"USE TEMP B-TREE FOR (ORDER BY|GROUP BY)")
+POSTGRES_TABLE_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+def hot_queries() -> Dict[str, Any]:
+    """Statements mirroring the queries in app/api and the services they call"""
+    chats = select(Chat).where(Chat.user_id == USER_ID)
+    messages = select(Message).where(Message.chat_id == CHAT_ID)
+    summary = ChatSummary(chat_id=CHAT_ID, last_message_at=datetime(2026, 1, 1), last_message_id=MESSAGE_ID)
+    unsummarized = messages.where(after_summary(summary))
+
+    return {
+        "auth: user by id": select(User).where(User.id == USER_ID),
+        "auth: user by email": select(User).where(User.email == "user@example.com"),
+        "chats: first page": keyset_query(chats, Chat, Chat.updated_at).limit(50),
+        "chats: before cursor": keyset_query(chats, Chat, Chat.updated_at, before=CHAT_CURSOR).limit(50),
+        "chats: after cursor": keyset_query(chats, Chat, Chat.updated_at, after=CHAT_CURSOR).limit(50),
+        "chats: by id": select(Chat).where(Chat.id == CHAT_ID, Chat.user_id == USER_ID),
+        "messages: chat summary": select(ChatSummary).where(ChatSummary.chat_id == CHAT_ID),
+        "messages: unsummarized count": select(func.count()).select_from(unsummarized.subquery()),
+        "messages: recent history": unsummarized.order_by(Message.timestamp.desc(), Message.id.desc()).limit(50),
+        "messages: first page": keyset_query(messages, Message, Message.timestamp).limit(50),
+        "messages: before cursor": keyset_query(messages, Message, Message.timestamp, before=MESSAGE_CURSOR).limit(50),
+        "messages: after cursor": keyset_query(messages, Message, Message.timestamp, after=MESSAGE_CURSOR).limit(50),
+        "messages: summary window": unsummarized.order_by(Message.timestamp.asc(), Message.id.asc()).limit(10),
+        "messages: by id with owner": select(Message).join(Chat).where(
+            Message.id == MESSAGE_ID,
+            Chat.user_id == USER_ID
+        ),
+        "files: job by id": select(FileJob).where(FileJob.id == JOB_ID, FileJob.user_id == USER_ID),
+        "files: abandoned jobs": select(FileJob).where(file_job_queue.abandoned(datetime(2026, 1, 1))),
+    }
+
+def _explain(db: Session, statement: Any) -> List[str]:
+    connection = db.connection()
+    dialect = connection.dialect
+    compiled = statement.compile(
+        dialect=dialect,
+        compile_kwargs={"render_postcompile": True}
+    )
+    if compiled.positional:
+        params: Any = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+
+    if dialect.name == "sqlite":
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+        return [row[-1] for row in rows]
+
+    rows = connection.exec_driver_sql(f"EXPLAIN {compiled}", params).all()
+    return [row[0] for row in rows]
+
+def _problems(dialect: str, plan: List[str]) -> List[str]:
+    problems = []
+    for line in plan:
+        if dialect == "sqlite":
+            match = SQLITE_TABLE_SCAN.search(line.strip())
+            if match:
+                problems.append(f"table scan on {match.group(1)}")
+            elif SQLITE_SORT.search(line):
+                problems.append(line.strip().lower())
+        else:
+            match = POSTGRES_TABLE_SCAN.search(line)
+            if match:
+                problems.append(f"table scan on {match.group(1)}")
+    return problems
+
+def audit(session_factory: Callable[[], Session]) -> List[Tuple[str, List[str], List[str]]]:
+    """
+    Explain every hot query
+
+    Returns (name, plan lines, problems) for each query.
+    """
+    results = []
+    db = session_factory()
+    try:
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            # Tiny or empty tables make sequential scans look cheapest; only
+            # report scans the planner cannot avoid
+            db.connection().exec_driver_sql("SET LOCAL enable_seqscan = off")
+
+        for name, statement in hot_queries().items():
+            plan = _explain(db, statement)
+            results.append((name, plan, _problems(dialect, plan)))
+    finally:
+        db.rollback()
+        db.close()
+    return results
+
+def main(argv: List[str]) -> int:
+    if len(argv) > 1:
+        engine = create_engine(argv[1])
+    else:
+        engine = create_engine("sqlite://")
+        # Only the model metadata is audited; keep migrations in step with it
+        import app.models.document_cache  # noqa: F401
+        Base.metadata.create_all(bind=engine)
+
+    failures = 0
+    for name, plan, problems in audit(sessionmaker(bind=engine)):
+        status = "FAIL" if problems else "ok"
+        print(f"[{status}] {name}")
+        for line in plan:
+            print(f"    {line}")
+        for problem in problems:
+            print(f"    -> {problem}")
+        failures += bool(problems)
+
+    print(f"{failures} queries need a table scan or sort")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -1,10 +1,30 @@
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Callable, Optional, Tuple, TypeVar, Union
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+from fastapi import HTTPException, status
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+T = TypeVar("T")
+
+# Hashes with any other cost are flagged for rehashing by verify_and_update
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.password_hash_rounds,
+    bcrypt__min_rounds=settings.password_hash_rounds,
+    bcrypt__max_rounds=settings.password_hash_rounds
+)
+
+# bcrypt releases the GIL, so a small dedicated pool keeps hashing off the
+# event loop without taking threads from the shared request threadpool
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="password-hash"
+)
+_password_slots = asyncio.Semaphore(settings.password_hash_max_pending)
 
 def create_access_token(
     subject: Union[str, Any], expires_delta: timedelta = None
@@ -19,11 +39,38 @@ def create_access_token(
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def _run_password_task(func: Callable[..., T], *args: Any) -> T:
+    """
+    Run a bcrypt call on the password executor
+
+    At most password_hash_max_pending calls may be running or waiting at
+    once; a login storm beyond that is rejected instead of queueing without
+    bound.
+    """
+    if _password_slots.locked():
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many sign-in attempts. Please try again later.",
+            headers={"Retry-After": "1"}
+        )
+
+    async with _password_slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, func, *args)
+
+async def verify_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Check a password against its stored hash
+
+    Returns whether the password matches and, if the hash was made with
+    outdated settings, a replacement hash to store.
+    """
+    return await _run_password_task(pwd_context.verify_and_update, plain_password, hashed_password)
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+async def get_password_hash(password: str) -> str:
+    return await _run_password_task(pwd_context.hash, password)
 
 def verify_token(token: str) -> Union[str, None]:
     try:
@@ -0,0 +1,6 @@
+import json
+
+def sse_event(data: dict, event: str = None) -> str:
+    """Format a Server-Sent Events frame"""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
\ No newline at end of file
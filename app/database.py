@@ -1,30 +1,164 @@
-from sqlalchemy import create_engine
+from typing import Any, Dict
+import time
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+from app.core.config import settings
+from app.core.metrics import registry
 
-load_dotenv()
+DATABASE_URL = settings.database_url
 
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./fin_jurist.db")
+# Async drivers used for each database when ASYNC_DATABASE_URL is not set
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
 
+def get_async_database_url(url: str) -> str:
+    """Swap the driver of a sync database URL for its async counterpart"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.get_backend_name()}")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = settings.async_database_url or get_async_database_url(DATABASE_URL)
+
+class PoolStats:
+    """Checkout counters for a connection pool"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, wait_seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += wait_seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Async queue pool that records how long each checkout waits
+
+    Stats live on the class so they survive pool.recreate() on dispose.
+    """
+
+    stats = PoolStats()
+
+    def connect(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            self.stats.record(time.perf_counter() - start)
+
+def is_memory_database(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+def pool_options(url: str) -> Dict[str, Any]:
+    """Pool arguments from settings; in-memory SQLite keeps its default single connection"""
+    if is_memory_database(url):
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+def set_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+    # WAL lets readers proceed while a writer commits; busy_timeout makes
+    # concurrent writers wait for the lock instead of failing immediately
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+    finally:
+        cursor.close()
+
+def configure_sqlite(engine: Engine) -> None:
+    if engine.dialect.name == "sqlite" and not is_memory_database(str(engine.url)):
+        event.listen(engine, "connect", set_sqlite_pragmas)
+
+# The sync engine is only used to create tables at startup
 engine = create_engine(
-    DATABASE_URL, 
+    DATABASE_URL,
     connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
 )
+configure_sqlite(engine)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    **({} if is_memory_database(ASYNC_DATABASE_URL) else {"poolclass": TimedAsyncQueuePool}),
+    **pool_options(ASYNC_DATABASE_URL)
+)
+configure_sqlite(async_engine.sync_engine)
+
+# Objects stay usable after commit; lazy loads are not possible in async code
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
 
 Base = declarative_base()
 
 # Dependency
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 # Create tables
 def create_tables():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+
+def get_pool_status() -> Dict[str, Any]:
+    """Current state and checkout stats of the request connection pool"""
+    pool: Pool = async_engine.pool
+    status: Dict[str, Any] = {"class": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "max_overflow": settings.db_max_overflow,
+            "timeout_seconds": settings.db_pool_timeout,
+        })
+    if isinstance(pool, TimedAsyncQueuePool):
+        stats = pool.stats
+        status.update({
+            "checkouts": stats.checkouts,
+            "checkout_timeouts": stats.timeouts,
+            "checkout_wait_seconds_total": round(stats.wait_seconds_total, 6),
+            "checkout_wait_seconds_max": round(stats.wait_seconds_max, 6),
+            "checkout_wait_seconds_avg": round(stats.wait_seconds_total / stats.checkouts, 6) if stats.checkouts else 0.0,
+        })
+    return status
+
+def _pool_gauge(field: str):
+    def collect() -> Dict[Any, float]:
+        value = get_pool_status().get(field)
+        return {(): value} if value is not None else {}
+    return collect
+
+for _field, _documentation in (
+    ("checked_out", "Database connections currently checked out"),
+    ("overflow", "Database connections open beyond the pool size"),
+    ("checkouts", "Database connection checkouts since startup"),
+    ("checkout_timeouts", "Database connection checkouts that timed out"),
+    ("checkout_wait_seconds_total", "Total time spent waiting for database connections"),
+    ("checkout_wait_seconds_max", "Longest wait for a database connection"),
+):
+    registry.gauge(f"db_pool_{_field}", _documentation, _pool_gauge(_field))
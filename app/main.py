@@ -1,10 +1,17 @@
+import time
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import text
 from app.core.config import settings
-from app.database import create_tables
+from app.core.metrics import registry, http_request_duration
+from app.database import AsyncSessionLocal, create_tables, get_pool_status
 from app.api import auth, chats, messages, files
+from app.services.ai_service import ai_service
+from app.services.job_queue import file_job_queue
+from app.services.extraction import extractor_pool
+from app.core.security import password_executor
 
 # Create tables on startup
 create_tables()
@@ -23,6 +30,33 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         content={"detail": exc.errors(), "body": exc.body}
     )
 
+def route_template(request: Request) -> str:
+    """Path template of the matched route, so metrics are not labelled per id"""
+    route = request.scope.get("route")
+    if route is None:
+        return "unmatched"
+    # Newer FastAPI versions keep included routes relative to their router
+    # and record the full template separately
+    context = request.scope.get("fastapi", {}).get("effective_route_context")
+    return getattr(context, "path", None) or route.path
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    # Streaming responses are timed until their headers are sent
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        http_request_duration.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=route_template(request),
+            status=str(status_code)
+        )
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -30,6 +64,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Cursor-Before", "X-Cursor-After"],
 )
 
 # Include routers
@@ -38,6 +73,18 @@ app.include_router(chats.router, prefix="/chats", tags=["Chats"])
 app.include_router(messages.router, prefix="/messages", tags=["Messages"])
 app.include_router(files.router, prefix="/files", tags=["Files"])
 
+@app.on_event("startup")
+async def start_file_job_queue():
+    extractor_pool.start()
+    await file_job_queue.start()
+
+@app.on_event("shutdown")
+async def close_ai_client():
+    await file_job_queue.stop()
+    extractor_pool.stop()
+    password_executor.shutdown(wait=False)
+    await ai_service.close()
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to Fin-Jurist API"}
@@ -46,6 +93,23 @@ def read_root():
 def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/db")
+async def database_health_check():
+    """Database round trip time and connection pool metrics"""
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("SELECT 1"))
+    return {
+        "status": "healthy",
+        "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+        "pool": get_pool_status()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Metrics in the Prometheus text exposition format"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
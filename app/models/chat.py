@@ -1,17 +1,26 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
+from datetime import datetime, timezone
 import uuid
 
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
 class Chat(Base):
     __tablename__ = "chats"
+    __table_args__ = (
+        Index("ix_chats_user_id_updated_at", "user_id", "updated_at", "id"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     title = Column(String, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Timestamps are set in Python rather than by the database so every stored
+    # value has the same precision and compares exactly with a cursor's value
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), default=utcnow)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), default=utcnow, onupdate=utcnow)
     
     # Relationships
     user = relationship("User", back_populates="chats")
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+class ChatSummary(Base):
+    __tablename__ = "chat_summaries"
+    
+    chat_id = Column(String, ForeignKey("chats.id"), primary_key=True)
+    summary = Column(Text, nullable=False, default="")
+    # Newest message folded into the summary; messages after it in
+    # (timestamp, id) order have not been summarized yet
+    last_message_at = Column(DateTime(timezone=True), nullable=True)
+    last_message_id = Column(String, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    chat = relationship("Chat", back_populates="summary")
+
+# Add relationship to Chat model
+from app.models.chat import Chat
+Chat.summary = relationship("ChatSummary", back_populates="chat", uselist=False, cascade="all, delete-orphan")
\ No newline at end of file
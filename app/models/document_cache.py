@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.database import Base
+import uuid
+
+class DocumentCacheEntry(Base):
+    __tablename__ = "document_cache"
+    __table_args__ = (
+        Index("ix_document_cache_lookup", "user_id", "content_hash", "file_type", unique=True),
+        Index("ix_document_cache_last_accessed_at", "last_accessed_at"),
+    )
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    content_hash = Column(String, nullable=False)  # sha256 of the uploaded bytes
+    file_type = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    content = Column(Text, nullable=False)
+    ai_analysis = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_accessed_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.database import Base
+import uuid
+
+class FileJob(Base):
+    __tablename__ = "file_jobs"
+    __table_args__ = (
+        Index("ix_file_jobs_user_id_created_at", "user_id", "created_at"),
+        Index("ix_file_jobs_status", "status"),
+    )
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    filename = Column(String, nullable=False)
+    file_type = Column(String, nullable=True)
+    size = Column(Integer, nullable=True)
+    status = Column(String, nullable=False, default="queued")  # 'queued', 'processing', 'completed' or 'failed'
+    content = Column(Text, nullable=True)
+    ai_analysis = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    worker_id = Column(String, nullable=True)  # process whose queue holds the job
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Relationships
+    user = relationship("User")
\ No newline at end of file
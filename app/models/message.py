@@ -1,17 +1,22 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.chat import utcnow
 import uuid
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_chat_id_timestamp", "chat_id", "timestamp", "id"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
     chat_id = Column(String, ForeignKey("chats.id"), nullable=False)
     content = Column(Text, nullable=False)
     role = Column(String, nullable=False)  # 'user' or 'assistant'
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    # Set in Python, like the chat timestamps, so it compares exactly with a cursor's value
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), default=utcnow)
     
     # Relationships
     chat = relationship("Chat", back_populates="messages")
\ No newline at end of file
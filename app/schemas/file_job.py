@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Literal, Optional
+
+class FileJob(BaseModel):
+    id: str
+    filename: str
+    file_type: Optional[str] = None
+    size: Optional[int] = None
+    status: Literal["queued", "processing", "completed", "failed"]
+    content: Optional[str] = None
+    ai_analysis: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
\ No newline at end of file
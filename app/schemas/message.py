@@ -18,4 +18,8 @@ class MessageInDBBase(MessageBase):
         from_attributes = True
 
 class Message(MessageInDBBase):
-    pass
\ No newline at end of file
+    pass
+
+class MessageSearchResult(MessageInDBBase):
+    snippet: str
+    rank: float
\ No newline at end of file
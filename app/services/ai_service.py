@@ -1,43 +1,36 @@
-from openai import OpenAI
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Optional
+from contextlib import asynccontextmanager
+from functools import partial
+import asyncio
 import os
+import time
+import httpx
+from starlette.concurrency import run_in_threadpool
 from ..core.config import settings
+from ..core.metrics import (
+    registry,
+    register_cache_stats,
+    ai_queue_wait,
+    ai_time_to_first_token,
+    ai_request_duration,
+    ai_prompt_tokens,
+    ai_completion_tokens,
+    ai_coalesced_requests,
+)
+from .provider_router import (
+    AIServiceError,
+    AIServiceTimeout,
+    AIServiceUnavailable,
+    Provider,
+    build_provider_router,
+)
+from .response_cache import ResponseCache, build_response_cache
+from .semantic_cache import build_semantic_cache
+from .context_builder import estimate_tokens, estimate_message_tokens
+from .document_analysis import chunk_document
 
-class AIService:
-    def __init__(self):
-        self.base_url = "https://api.novita.ai/v3/openai"
-        self.api_key = "sk_6x6NBoPSjoJCAUKe9iUVZZkgvsslVVphmcWY4C2S5YY"
-        self.model = "deepseek/deepseek-v3-0324"
-        
-        self.client = OpenAI(
-            base_url=self.base_url,
-            api_key=self.api_key,
-        )
-    
-    async def generate_response(self, messages: List[Dict[str, str]], stream: bool = False) -> str:
-        """
-        Generate AI response using Novita AI
-        
-        Args:
-            messages: List of message objects with 'role' and 'content'
-            stream: Whether to stream the response
-            
-        Returns:
-            Generated response text
-        """
-        try:
-            # Format messages for OpenAI API
-            formatted_messages = []
-            for msg in messages:
-                formatted_messages.append({
-                    "role": msg.get("role", "user"),
-                    "content": msg.get("content", "")
-                })
-            
-            # Add enhanced system prompt for financial legal assistant
-            system_prompt = {
-                "role": "system",
-                "content": """You are FinYurist AI, a professional financial legal advisor specializing in financial law and contract analysis. Your expertise includes:
+# Enhanced system prompt for financial legal assistant
+SYSTEM_PROMPT = """You are FinYurist AI, a professional financial legal advisor specializing in financial law and contract analysis. Your expertise includes:
 
 1. FINANCIAL LAW EXPERTISE:
 - Banking regulations and consumer protection
@@ -78,30 +71,300 @@ ALWAYS:
 - Include disclaimers when appropriate
 
 REMEMBER: You provide informational guidance only. Always recommend consulting qualified legal professionals for official legal advice."""
-            }
-            formatted_messages.insert(0, system_prompt)
+
+CONTRACT_REPORT_SECTIONS = """1. SUMMARY: Brief overview of the contract's main terms
+2. KEY TERMS: Important clauses and conditions
+3. RISKS & RED FLAGS: Potentially harmful or unfavorable terms
+4. HIDDEN COSTS: Any fees or charges that might not be obvious
+5. RECOMMENDATIONS: Suggestions for protection or negotiation
+6. WARNING LEVEL: Rate the risk level (LOW/MEDIUM/HIGH) with explanation"""
+
+class AIService:
+    def __init__(self):
+        # Shared keep-alive pool so concurrent requests reuse connections
+        # instead of blocking the event loop on a synchronous client
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.ai_max_connections,
+                max_keepalive_connections=settings.ai_max_keepalive_connections,
+                keepalive_expiry=settings.ai_keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                settings.ai_request_timeout,
+                connect=settings.ai_connect_timeout,
+            ),
+        )
+        
+        # Hedging only while no request is queued for a slot; latency samples
+        # time the provider call alone, never the wait for a slot
+        self.router = build_provider_router(
+            self.http_client,
+            hedge_allowed=lambda: self.waiting_requests == 0
+        )
+        
+        # Context budgets and cache keys follow the first configured provider
+        self.model = self.router.primary.model
+        
+        # Bounds concurrent provider calls; time spent waiting here is the
+        # queue wait reported in the metrics
+        self.request_slots = asyncio.Semaphore(settings.ai_max_concurrent_requests)
+        self.waiting_requests = 0
+        
+        # Provider calls currently running, keyed like the response cache so
+        # concurrent identical requests can share one call
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        
+        self.response_cache = build_response_cache()
+        self.semantic_cache = build_semantic_cache()
+    
+    async def close(self) -> None:
+        """
+        Close the pooled HTTP connections
+        """
+        for task in list(self._in_flight.values()):
+            task.cancel()
+        await self.http_client.aclose()
+    
+    def _format_messages(self, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Format messages for the OpenAI API and prepend the system prompt
+        """
+        formatted_messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+        for msg in messages:
+            formatted_messages.append({
+                "role": msg.get("role", "user"),
+                "content": msg.get("content", "")
+            })
+        return formatted_messages
+    
+    async def generate_response(
+        self,
+        messages: List[Dict[str, str]],
+        stream: bool = False,
+        use_cache: bool = False
+    ) -> str:
+        """
+        Generate AI response using Novita AI
+        
+        Args:
+            messages: List of message objects with 'role' and 'content'
+            stream: Whether to stream the response
+            use_cache: Serve identical prompts from the response cache
+            
+        Returns:
+            Generated response text
             
-            chat_completion_res = self.client.chat.completions.create(
-                model=self.model,
+        Raises:
+            AIServiceError: No provider produced an answer
+        """
+        if stream:
+            # Handle streaming response
+            response_text = ""
+            async for delta in self.stream_response(messages):
+                response_text += delta
+            return response_text
+        
+        return await self._complete(messages, use_cache=use_cache)
+    
+    @asynccontextmanager
+    async def _request_slot(self, operation: str) -> AsyncIterator[None]:
+        """
+        Hold one of the provider request slots, recording the wait
+        """
+        start = time.perf_counter()
+        self.waiting_requests += 1
+        try:
+            await self.request_slots.acquire()
+        finally:
+            self.waiting_requests -= 1
+        ai_queue_wait.observe(time.perf_counter() - start, operation=operation)
+        try:
+            yield
+        finally:
+            self.request_slots.release()
+    
+    def _record_usage(
+        self,
+        model: str,
+        usage: Any,
+        formatted_messages: List[Dict[str, str]],
+        response_text: str
+    ) -> None:
+        if usage is not None:
+            prompt_tokens = usage.prompt_tokens
+            completion_tokens = usage.completion_tokens
+        else:
+            # Not every provider reports usage; fall back to the local estimate
+            prompt_tokens = sum(estimate_message_tokens(msg) for msg in formatted_messages)
+            completion_tokens = estimate_tokens(response_text)
+        ai_prompt_tokens.inc(prompt_tokens, model=model)
+        ai_completion_tokens.inc(completion_tokens, model=model)
+    
+    async def _complete(
+        self,
+        messages: List[Dict[str, str]],
+        use_cache: bool = False,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """
+        Request a non-streaming completion, raising on provider errors
+        """
+        formatted_messages = self._format_messages(messages)
+        cache = self.response_cache if use_cache else None
+        if cache is not None:
+            cached = await cache.get(self.model, formatted_messages)
+            if cached is not None:
+                return cached
+        
+        response_text = await self._single_flight(
+            formatted_messages, max_tokens or settings.ai_max_tokens
+        )
+        
+        if cache is not None and response_text:
+            await cache.set(self.model, formatted_messages, response_text)
+        return response_text
+    
+    async def _single_flight(self, formatted_messages: List[Dict[str, str]], max_tokens: int) -> str:
+        """
+        Share one provider call between concurrent identical requests
+        
+        The call runs as its own task and every caller awaits it through
+        asyncio.shield, so a caller that is cancelled (for example because
+        its client disconnected) stops waiting without cancelling the call
+        for the others.
+        """
+        if not settings.ai_single_flight_enabled:
+            return await self._fetch_completion(formatted_messages, max_tokens)
+        
+        key = ResponseCache.make_key(f"{self.model}:{max_tokens}", formatted_messages)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_completion(formatted_messages, max_tokens))
+            self._in_flight[key] = task
+            task.add_done_callback(partial(self._finish_flight, key))
+        else:
+            ai_coalesced_requests.inc(model=self.model)
+        return await asyncio.shield(task)
+    
+    def _finish_flight(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the error as retrieved; it is not unhandled just because
+        # every caller stopped waiting
+        if not task.cancelled():
+            task.exception()
+    
+    async def _fetch_completion(self, formatted_messages: List[Dict[str, str]], max_tokens: int) -> str:
+        """
+        Make one non-streaming completion through the provider router
+        """
+        # The slot is held around the whole routed call, so time queued here
+        # never counts against an attempt's timeout or a provider's health
+        async with self._request_slot("complete"):
+            return await self.router.run(
+                partial(self._provider_completion, formatted_messages, max_tokens)
+            )
+    
+    async def _provider_completion(
+        self,
+        formatted_messages: List[Dict[str, str]],
+        max_tokens: int,
+        provider: Provider
+    ) -> str:
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            chat_completion_res = await provider.client.chat.completions.create(
+                model=provider.model,
                 messages=formatted_messages,
-                stream=stream,
-                max_tokens=1000,
+                max_tokens=max_tokens,
                 extra_body={}
             )
+            outcome = "success"
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            ai_request_duration.observe(
+                time.perf_counter() - start,
+                operation="complete", provider=provider.name, model=provider.model, outcome=outcome
+            )
+        response_text = chat_completion_res.choices[0].message.content
+        self._record_usage(provider.model, chat_completion_res.usage, formatted_messages, response_text or "")
+        return response_text
+    
+    async def _generate_with_semantic_cache(
+        self,
+        namespace: str,
+        question: str,
+        messages: List[Dict[str, str]],
+        use_cache: bool = False
+    ) -> str:
+        """
+        Serve near-duplicate questions from the semantic cache when enabled
+        """
+        if self.semantic_cache is None:
+            return await self.generate_response(messages, use_cache=use_cache)
+        
+        # Answers depend on the prompt template and model, so keep them apart
+        namespace = f"{self.model}:{namespace}"
+        # A lookup scans every cached entry, so keep it off the event loop
+        cached = await run_in_threadpool(self.semantic_cache.get, namespace, question)
+        if cached is not None:
+            return cached
+        
+        response_text = await self._complete(messages, use_cache=use_cache)
+        if response_text:
+            await run_in_threadpool(self.semantic_cache.set, namespace, question, response_text)
+        return response_text
+    
+    async def stream_response(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """
+        Stream AI response text deltas as they arrive from the provider
+        
+        Args:
+            messages: List of message objects with 'role' and 'content'
             
-            if stream:
-                # Handle streaming response
-                response_text = ""
-                for chunk in chat_completion_res:
-                    if chunk.choices[0].delta.content:
-                        response_text += chunk.choices[0].delta.content
-                return response_text
-            else:
-                return chat_completion_res.choices[0].message.content
-                
-        except Exception as e:
-            print(f"AI Service Error: {e}")
-            return "Sorry, there is currently an issue with the AI service. Please try again later."
+        Yields:
+            Response text fragments in arrival order
+        """
+        formatted_messages = self._format_messages(messages)
+        async with self._request_slot("stream"):
+            start = time.perf_counter()
+            
+            async def open_stream(provider: Provider):
+                return provider, await provider.client.chat.completions.create(
+                    model=provider.model,
+                    messages=formatted_messages,
+                    stream=True,
+                    max_tokens=settings.ai_max_tokens,
+                    extra_body={}
+                )
+            
+            # Streams fail over while opening but are not hedged, since the
+            # reply is forwarded to the client as it arrives
+            provider, chat_completion_res = await self.router.run(open_stream, hedge=False)
+            
+            outcome = "error"
+            first_token = True
+            usage = None
+            parts = []
+            try:
+                async for chunk in chat_completion_res:
+                    usage = getattr(chunk, "usage", None) or usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        if first_token:
+                            ai_time_to_first_token.observe(time.perf_counter() - start, model=provider.model)
+                            first_token = False
+                        parts.append(chunk.choices[0].delta.content)
+                        yield chunk.choices[0].delta.content
+                outcome = "success"
+            finally:
+                ai_request_duration.observe(
+                    time.perf_counter() - start,
+                    operation="stream", provider=provider.name, model=provider.model, outcome=outcome
+                )
+                self._record_usage(provider.model, usage, formatted_messages, "".join(parts))
     
     async def generate_legal_advice(self, user_question: str, context: str = "") -> str:
         """
@@ -114,23 +377,25 @@ REMEMBER: You provide informational guidance only. Always recommend consulting q
             }
         ]
         
-        return await self.generate_response(messages)
+        return await self._generate_with_semantic_cache(
+            "legal_advice", f"{user_question}\n{context}", messages
+        )
     
     async def analyze_contract(self, contract_text: str, contract_type: str = "financial") -> str:
         """
         Analyze financial contracts and identify risks
         """
+        if estimate_tokens(contract_text) > settings.document_chunk_tokens:
+            return await self.analyze_long_document(
+                contract_text, f"{contract_type} contract", CONTRACT_REPORT_SECTIONS
+            )
+        
         messages = [
             {
                 "role": "user",
                 "content": f"""Please analyze this {contract_type} contract and provide:
                 
-1. SUMMARY: Brief overview of the contract's main terms
-2. KEY TERMS: Important clauses and conditions
-3. RISKS & RED FLAGS: Potentially harmful or unfavorable terms
-4. HIDDEN COSTS: Any fees or charges that might not be obvious
-5. RECOMMENDATIONS: Suggestions for protection or negotiation
-6. WARNING LEVEL: Rate the risk level (LOW/MEDIUM/HIGH) with explanation
+{CONTRACT_REPORT_SECTIONS}
 
 Contract text:
 {contract_text}"""
@@ -139,6 +404,69 @@ Contract text:
         
         return await self.generate_response(messages)
     
+    async def analyze_long_document(self, text: str, document_label: str, report_sections: str) -> str:
+        """
+        Map-reduce analysis for documents larger than one prompt
+        
+        The text is split on clause boundaries into chunks of at most
+        document_chunk_tokens, each chunk is analyzed concurrently (bounded
+        by document_analysis_concurrency), and the per-chunk findings are
+        merged into a single report with the requested sections.
+        """
+        chunks = chunk_document(text, settings.document_chunk_tokens)
+        semaphore = asyncio.Semaphore(settings.document_analysis_concurrency)
+        
+        async def run(prompt: str) -> str:
+            async with semaphore:
+                return await self._complete([{"role": "user", "content": prompt}])
+        
+        findings = await asyncio.gather(*[
+            run(f"""You are reviewing part {index} of {len(chunks)} of a {document_label}. Extract the findings from this part only:
+
+- KEY TERMS: Important clauses and conditions (quote clause numbers where present)
+- RISKS & RED FLAGS: Potentially harmful or unfavorable terms
+- HIDDEN COSTS: Fees or charges that might not be obvious
+- RISK LEVEL: LOW/MEDIUM/HIGH for this part with a one-line reason
+
+Be concise and write "None" for empty categories.
+
+Part text:
+{chunk}""")
+            for index, chunk in enumerate(chunks, start=1)
+        ])
+        
+        # Merge findings in batches until they fit in a single prompt
+        while len(findings) > 1 and estimate_tokens("\n\n".join(findings)) > settings.document_chunk_tokens:
+            batches = chunk_document(
+                "\n\n".join(f"Findings {i}:\n{f}" for i, f in enumerate(findings, start=1)),
+                settings.document_chunk_tokens
+            )
+            if len(batches) >= len(findings):
+                break
+            findings = await asyncio.gather(*[
+                run(f"""Merge these findings from consecutive parts of a {document_label} into one list with the same categories (KEY TERMS, RISKS & RED FLAGS, HIDDEN COSTS, RISK LEVEL). Keep every distinct risk and the highest risk level.
+
+{batch}""")
+                for batch in batches
+            ])
+        
+        part_findings = "\n\n".join(
+            f"### Part {index}\n{finding}" for index, finding in enumerate(findings, start=1)
+        )
+        return await self._complete([
+            {
+                "role": "user",
+                "content": f"""Below are findings from consecutive parts of a {document_label} that was too long to review at once. Combine them into one analysis of the whole document and provide:
+
+{report_sections}
+
+Overall risk ratings must reflect the most serious risks found in any part.
+
+Findings:
+{part_findings}"""
+            }
+        ])
+    
     async def detect_financial_fraud(self, description: str) -> str:
         """
         Analyze potential financial fraud or scam
@@ -162,7 +490,7 @@ Be thorough in identifying potential risks and provide clear warnings."""
             }
         ]
         
-        return await self.generate_response(messages)
+        return await self.generate_response(messages, use_cache=True)
     
     async def generate_document_template(self, document_type: str, details: str = "") -> str:
         """
@@ -200,7 +528,7 @@ Provide the complete template ready for use."""
             }
         ]
         
-        return await self.generate_response(messages)
+        return await self.generate_response(messages, use_cache=True)
     
     async def provide_financial_education(self, topic: str) -> str:
         """
@@ -224,7 +552,66 @@ Use simple language that anyone can understand."""
             }
         ]
         
-        return await self.generate_response(messages)
+        return await self._generate_with_semantic_cache(
+            "financial_education", topic, messages, use_cache=True
+        )
+    
+    async def summarize_conversation(self, previous_summary: str, messages: List[Dict[str, str]]) -> str:
+        """
+        Fold new conversation turns into a running summary
+        """
+        transcript = "\n".join(
+            f"{msg.get('role', 'user').upper()}: {msg.get('content', '')}" for msg in messages
+        )
+        
+        messages = [
+            {
+                "role": "user",
+                "content": f"""Update the running summary of a financial-legal consultation.
+
+Current summary:
+{previous_summary or "(none)"}
+
+New conversation turns:
+{transcript}
+
+Write the updated summary in at most {settings.summary_max_words} words. Keep the user's situation, key facts, amounts, dates, documents mentioned and advice already given. Return only the summary text."""
+            }
+        ]
+        
+        return await self._complete(messages, max_tokens=settings.summary_max_tokens)
+
+ai_service = AIService()
 
-# Global AI service instance
-ai_service = AIService()
\ No newline at end of file
+registry.gauge(
+    "ai_requests_waiting",
+    "AI requests waiting for a concurrency slot",
+    lambda: {(): ai_service.waiting_requests}
+)
+register_cache_stats(
+    registry,
+    "ai_response_cache",
+    "AI response cache",
+    lambda: ai_service.response_cache.stats() if ai_service.response_cache else None
+)
+register_cache_stats(
+    registry,
+    "ai_semantic_cache",
+    "Semantic cache",
+    lambda: ai_service.semantic_cache.stats() if ai_service.semantic_cache else None
+)
+registry.gauge(
+    "ai_provider_health",
+    "Routing health score of each AI provider (1 is healthy)",
+    lambda: {(provider.name,): provider.health for provider in ai_service.router.providers},
+    ("provider",)
+)
+registry.gauge(
+    "ai_provider_circuit_open",
+    "Whether each AI provider's circuit breaker is refusing calls (1 is open)",
+    lambda: {
+        (provider.name,): 1 if provider.breaker.state == provider.breaker.OPEN else 0
+        for provider in ai_service.router.providers
+    },
+    ("provider",)
+)
@@ -0,0 +1,63 @@
+from typing import List, Dict, Optional
+from ..core.config import settings
+
+# Rough per-message overhead for role markers and separators
+MESSAGE_TOKEN_OVERHEAD = 4
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap local token estimate (about four characters per token)
+
+    Good enough for budgeting without loading a model-specific tokenizer.
+    """
+    return (len(text) + 3) // 4
+
+def estimate_message_tokens(message: Dict[str, str]) -> int:
+    return estimate_tokens(message.get("content", "")) + MESSAGE_TOKEN_OVERHEAD
+
+def get_context_budget(model: str) -> int:
+    """Token budget for chat history plus the new message for a model"""
+    return settings.model_context_budgets.get(model, settings.context_token_budget)
+
+def build_context(
+    history: List[Dict[str, str]],
+    current_message: Dict[str, str],
+    model: str,
+    summary: Optional[str] = None
+) -> List[Dict[str, str]]:
+    """
+    Select the most recent history that fits the model's token budget
+
+    Args:
+        history: Previous messages in chronological order
+        current_message: The new user message, always included
+        model: Model name used to look up the budget
+        summary: Rolling summary of turns older than the history, if any
+
+    Returns:
+        Chronological message list ending with the current message
+    """
+    budget = get_context_budget(model) - estimate_message_tokens(current_message)
+
+    summary_message = None
+    if summary:
+        summary_message = {
+            "role": "system",
+            "content": f"Summary of the earlier conversation:\n{summary}"
+        }
+        budget -= estimate_message_tokens(summary_message)
+
+    selected = []
+    for message in reversed(history):
+        cost = estimate_message_tokens(message)
+        if cost > budget:
+            # Older turns are dropped once the budget is spent
+            break
+        selected.append(message)
+        budget -= cost
+
+    if summary_message is not None:
+        selected.append(summary_message)
+    selected.reverse()
+    selected.append(current_message)
+    return selected
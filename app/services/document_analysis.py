@@ -0,0 +1,56 @@
+from typing import List
+import re
+from .context_builder import estimate_tokens
+
+# Paragraph breaks and lines that open a numbered or labelled clause
+# ("1.", "4.2)", "Article 7", "Section 3", "Clause 12", "§ 5", "IV.")
+CLAUSE_BOUNDARY = re.compile(
+    r"\n\s*\n|\n(?=[ \t]*(?:(?:article|section|clause|§)\s*\d+|\d+(?:\.\d+)*[.)]\s|\d+(?:\.\d+)+\s|[IVXLC]+\.\s))",
+    re.IGNORECASE
+)
+
+def split_into_clauses(text: str) -> List[str]:
+    """Split a legal document on paragraph and clause boundaries"""
+    return [part.strip() for part in CLAUSE_BOUNDARY.split(text) if part and part.strip()]
+
+def _split_oversized(clause: str, max_chars: int) -> List[str]:
+    # Fall back to whitespace boundaries for clauses longer than a chunk
+    pieces = []
+    while len(clause) > max_chars:
+        cut = clause.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(clause[:cut].strip())
+        clause = clause[cut:].strip()
+    if clause:
+        pieces.append(clause)
+    return pieces
+
+def chunk_document(text: str, max_tokens: int) -> List[str]:
+    """
+    Pack consecutive clauses into chunks of at most max_tokens
+
+    Clauses are never split unless a single clause exceeds the budget on its
+    own, so findings stay attributable to whole clauses.
+    """
+    chunks = []
+    current: List[str] = []
+    current_tokens = 0
+
+    for clause in split_into_clauses(text):
+        pieces = [clause]
+        if estimate_tokens(clause) > max_tokens:
+            pieces = _split_oversized(clause, max_tokens * 4)
+
+        for piece in pieces:
+            piece_tokens = estimate_tokens(piece)
+            if current and current_tokens + piece_tokens > max_tokens:
+                chunks.append("\n\n".join(current))
+                current = []
+                current_tokens = 0
+            current.append(piece)
+            current_tokens += piece_tokens
+
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
\ No newline at end of file
@@ -0,0 +1,76 @@
+from typing import Optional
+from datetime import datetime, timezone
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.database import AsyncSessionLocal
+from app.models.document_cache import DocumentCacheEntry
+
+async def get_cached_document(
+    db: AsyncSession,
+    user_id: int,
+    content_hash: str,
+    file_type: str
+) -> Optional[DocumentCacheEntry]:
+    """
+    Look up a previously processed upload by content hash
+    
+    Entries are scoped to the uploading user, so identical files uploaded
+    by someone else are never served.
+    """
+    if not settings.document_cache_enabled:
+        return None
+    
+    entry = await db.scalar(select(DocumentCacheEntry).where(
+        DocumentCacheEntry.user_id == user_id,
+        DocumentCacheEntry.content_hash == content_hash,
+        DocumentCacheEntry.file_type == file_type
+    ))
+    
+    if entry is not None:
+        entry.last_accessed_at = datetime.now(timezone.utc)
+        await db.commit()
+    
+    return entry
+
+async def store_cached_document(
+    user_id: int,
+    content_hash: str,
+    file_type: str,
+    size: int,
+    content: str,
+    ai_analysis: str
+) -> None:
+    """Save a processed upload, evicting the least recently used entries over the cap"""
+    if not settings.document_cache_enabled:
+        return
+    
+    async with AsyncSessionLocal() as db:
+        db.add(DocumentCacheEntry(
+            user_id=user_id,
+            content_hash=content_hash,
+            file_type=file_type,
+            size=size,
+            content=content,
+            ai_analysis=ai_analysis,
+            last_accessed_at=datetime.now(timezone.utc)
+        ))
+        try:
+            await db.commit()
+        except IntegrityError:
+            # The same file finished processing twice concurrently
+            await db.rollback()
+            return
+        
+        overflow = await db.scalar(
+            select(func.count()).select_from(DocumentCacheEntry)
+        ) - settings.document_cache_max_entries
+        if overflow > 0:
+            stale_ids = select(DocumentCacheEntry.id).order_by(
+                DocumentCacheEntry.last_accessed_at.asc()
+            ).limit(overflow)
+            await db.execute(
+                delete(DocumentCacheEntry).where(DocumentCacheEntry.id.in_(stale_ids))
+            )
+            await db.commit()
\ No newline at end of file
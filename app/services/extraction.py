@@ -0,0 +1,309 @@
+from typing import Any, AsyncIterator, BinaryIO, Callable, Iterator, List, Optional
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+import asyncio
+import mmap
+import multiprocessing
+import os
+import tempfile
+import time
+import PyPDF2
+from docx import Document
+import speech_recognition as sr
+from pydub import AudioSegment
+from app.core.config import settings
+from app.core.metrics import registry, extraction_duration
+
+# Extractors may run in worker processes, so they must be top-level
+# functions that raise only picklable exceptions
+
+class ExtractionError(Exception):
+    """Raised when an uploaded file cannot be read"""
+
+    def __init__(self, detail: str, status_code: int = 400):
+        super().__init__(detail, status_code)
+        self.detail = detail
+        self.status_code = status_code
+
+class ExtractorPoolFull(Exception):
+    """Raised when too many extractions are already queued"""
+
+class ExtractionTimeout(Exception):
+    """Raised when an extraction exceeds the configured timeout"""
+
+@contextmanager
+def open_pdf_stream(file_path: Path) -> Iterator[BinaryIO]:
+    """
+    Open a PDF for reading, memory-mapped where possible
+
+    PdfReader seeks around the file constantly; a read-only mapping serves
+    those reads from the page cache without buffered copies, and every
+    shard worker shares the same mapped pages.
+    """
+    with open(file_path, 'rb') as file:
+        try:
+            stream = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty files and some filesystems cannot be mapped
+            yield file
+            return
+        try:
+            yield stream
+        finally:
+            stream.close()
+
+def count_pdf_pages(file_path: Path) -> int:
+    """Return the number of pages in a PDF file"""
+    try:
+        with open_pdf_stream(file_path) as stream:
+            return len(PyPDF2.PdfReader(stream).pages)
+    except Exception as e:
+        raise ExtractionError(f"Error reading PDF: {str(e)}")
+
+def extract_pdf_pages(file_path: Path, start: int, stop: int) -> List[str]:
+    """Extract the text of pages [start, stop) from a PDF file"""
+    try:
+        with open_pdf_stream(file_path) as stream:
+            pdf_reader = PyPDF2.PdfReader(stream)
+            return [pdf_reader.pages[i].extract_text() for i in range(start, stop)]
+    except Exception as e:
+        raise ExtractionError(f"Error reading PDF: {str(e)}")
+
+def extract_pdf_text(file_path: Path) -> str:
+    """Extract text from PDF file"""
+    return "\n".join(extract_pdf_pages(file_path, 0, count_pdf_pages(file_path))).strip()
+
+def extract_word_text(file_path: Path) -> str:
+    """Extract text from Word document"""
+    try:
+        doc = Document(file_path)
+        text = ""
+        for paragraph in doc.paragraphs:
+            text += paragraph.text + "\n"
+        return text.strip()
+    except Exception as e:
+        raise ExtractionError(f"Error reading Word document: {str(e)}")
+
+def transcribe_audio(file_path: Path) -> str:
+    """Transcribe audio to text"""
+    try:
+        # Convert audio to WAV format if needed
+        audio = AudioSegment.from_file(file_path)
+        
+        # Create temporary WAV file
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_wav:
+            audio.export(temp_wav.name, format="wav")
+            
+            # Transcribe audio
+            recognizer = sr.Recognizer()
+            with sr.AudioFile(temp_wav.name) as source:
+                audio_data = recognizer.record(source)
+                text = recognizer.recognize_google(audio_data, language='uz-UZ')
+            
+            # Clean up temporary file
+            os.unlink(temp_wav.name)
+            
+            return text
+    except sr.UnknownValueError:
+        return "Audio was not clear enough to transcribe. Please try recording again."
+    except sr.RequestError as e:
+        raise ExtractionError(f"Speech recognition service error: {str(e)}", status_code=500)
+    except Exception as e:
+        raise ExtractionError(f"Error transcribing audio: {str(e)}")
+
+@contextmanager
+def timed_extraction(extractor: str) -> Iterator[None]:
+    """Record how long an extraction took and how it ended"""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "success"
+    except ExtractionTimeout:
+        outcome = "timeout"
+        raise
+    finally:
+        extraction_duration.observe(time.perf_counter() - start, extractor=extractor, outcome=outcome)
+
+class ExtractionSlot:
+    """
+    One pending extraction, held until its caller and every task it
+    submitted have finished
+
+    A timed-out caller gives up its hold, but the slot stays taken until the
+    worker actually finishes, so max_pending bounds the work really running.
+    """
+
+    def __init__(self, pool: "ExtractorPool"):
+        self.pool = pool
+        self.holds = 1
+        self.pool.pending += 1
+
+    def track(self, future: "Future[Any]") -> None:
+        self.holds += 1
+        loop = asyncio.get_running_loop()
+
+        def done(_: "Future[Any]") -> None:
+            # Runs on an executor thread; pending is only touched on the loop
+            try:
+                loop.call_soon_threadsafe(self.release)
+            except RuntimeError:
+                pass  # the loop has already closed
+
+        future.add_done_callback(done)
+
+    def release(self) -> None:
+        self.holds -= 1
+        if self.holds == 0:
+            self.pool.pending -= 1
+
+class ExtractorPool:
+    """
+    Bounded executor for blocking document extractors
+
+    Keeps PDF/Word parsing and audio transcription off the event loop. At
+    most max_pending extractions may be running or waiting at once; further
+    submissions fail fast with ExtractorPoolFull. Uploads check the same
+    limit against the file jobs still queued (see backlog_full), so callers
+    are turned away with a 429 before a job is created.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        workers: int,
+        timeout: float,
+        max_pending: int,
+        pages_per_shard: int = 16
+    ):
+        self.kind = kind
+        self.workers = workers
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.pages_per_shard = pages_per_shard
+        self.pending = 0
+        self._executor: Optional[Executor] = None
+
+    def start(self) -> None:
+        if self.kind == "process":
+            # spawn avoids forking a process that already runs an event loop
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        elif self.kind == "thread":
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="extractor"
+            )
+        else:
+            raise ValueError(f"Unknown extractor pool kind: {self.kind}")
+
+    def stop(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def saturated(self) -> bool:
+        return self.pending >= self.max_pending
+
+    def backlog_full(self, queued: int) -> bool:
+        """Whether queued jobs plus pending extractions reach max_pending"""
+        return self.pending + queued >= self.max_pending
+
+    def _acquire(self) -> ExtractionSlot:
+        if self._executor is None:
+            self.start()
+        if self.saturated:
+            raise ExtractorPoolFull("Too many files are being processed, please try again later")
+        return ExtractionSlot(self)
+
+    def _submit(self, slot: ExtractionSlot, func: Callable[..., Any], *args: Any) -> "asyncio.Future[Any]":
+        future = self._executor.submit(func, *args)
+        slot.track(future)
+        return asyncio.wrap_future(future)
+
+    async def _wait(self, future: "asyncio.Future[Any]", deadline: float) -> Any:
+        remaining = deadline - asyncio.get_running_loop().time()
+        try:
+            # The worker keeps running after a timeout (holding its slot) but
+            # its result is dropped
+            return await asyncio.wait_for(future, max(remaining, 0))
+        except asyncio.TimeoutError:
+            raise ExtractionTimeout(f"File processing timed out after {self.timeout:g} seconds")
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run an extractor on the pool, enforcing backpressure and the timeout"""
+        slot = self._acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            with timed_extraction(func.__name__):
+                return await self._wait(
+                    self._submit(slot, func, *args),
+                    loop.time() + self.timeout
+                )
+        finally:
+            slot.release()
+
+    async def iter_pdf_pages(self, file_path: Path) -> AsyncIterator[str]:
+        """
+        Extract PDF pages in parallel shards, yielding them in page order
+
+        Each shard of pdf_pages_per_shard pages runs as its own task, so a
+        large document spreads across all workers. Pages are yielded as soon
+        as every earlier shard has finished, letting callers start on the
+        beginning of a document before the end is parsed. The whole document
+        counts as one pending extraction and shares a single timeout.
+        """
+        slot = self._acquire()
+        futures = []
+        try:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.timeout
+            page_count = await self._wait(
+                self._submit(slot, count_pdf_pages, file_path),
+                deadline
+            )
+
+            futures = [
+                self._submit(
+                    slot,
+                    extract_pdf_pages,
+                    file_path,
+                    start,
+                    min(start + self.pages_per_shard, page_count)
+                )
+                for start in range(0, page_count, self.pages_per_shard)
+            ]
+            for future in futures:
+                for page in await self._wait(future, deadline):
+                    yield page
+        finally:
+            # Shards that have not started are dropped; running ones keep the
+            # slot until they finish
+            for future in futures:
+                future.cancel()
+            slot.release()
+
+    async def extract_pdf_text(self, file_path: Path) -> str:
+        """Extract the full text of a PDF using parallel page shards"""
+        with timed_extraction("extract_pdf_text"):
+            pages = [page async for page in self.iter_pdf_pages(file_path)]
+        return "\n".join(pages).strip()
+
+# Global extractor pool instance
+extractor_pool = ExtractorPool(
+    kind=settings.extraction_pool_kind,
+    workers=settings.extraction_workers or os.cpu_count() or 1,
+    timeout=settings.extraction_timeout_seconds,
+    max_pending=settings.extraction_max_pending,
+    pages_per_shard=settings.pdf_pages_per_shard
+)
+
+registry.gauge(
+    "extraction_pending",
+    "Extractions running or waiting on the extractor pool",
+    lambda: {(): extractor_pool.pending}
+)
\ No newline at end of file
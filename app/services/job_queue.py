@@ -0,0 +1,194 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+import asyncio
+import uuid
+from fastapi import HTTPException
+from sqlalchemy import or_, select, update
+from app.core.config import settings
+from app.core.metrics import registry
+from app.database import AsyncSessionLocal
+from app.models.file_job import FileJob
+
+JobHandler = Callable[[], Awaitable[Dict[str, Any]]]
+
+ACTIVE_STATUSES = ("queued", "processing")
+TERMINAL_STATUSES = ("completed", "failed")
+
+class FileJobQueue:
+    """
+    In-process worker pool for file processing jobs
+
+    Job state lives in the file_jobs table so it can be polled from any
+    worker; this class only runs the handlers and wakes local listeners.
+    Each job row records the worker_id of the process queueing it, and that
+    process refreshes heartbeat_at while the job is active. Active jobs whose
+    heartbeat is older than stale_seconds were lost with their worker and
+    are marked failed by whichever worker notices first.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_queue: int = 0,
+        heartbeat_seconds: float = 30.0,
+        stale_seconds: float = 120.0,
+        poll_seconds: float = 1.0
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_seconds = stale_seconds
+        self.poll_seconds = poll_seconds
+        self.worker_id = uuid.uuid4().hex
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._events: Dict[str, asyncio.Event] = {}
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        await self._fail_abandoned_jobs()
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def full(self) -> bool:
+        return self._queue is not None and self._queue.full()
+
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(self, job_id: str, handler: JobHandler) -> None:
+        """
+        Queue a job whose row has already been committed
+
+        Raises asyncio.QueueFull when max_queue jobs are already waiting.
+        """
+        self._queue.put_nowait((job_id, handler))
+        self._events[job_id] = asyncio.Event()
+
+    async def wait(self, job_id: str, timeout: float) -> None:
+        """
+        Wait until the job finishes or the timeout expires
+
+        Jobs queued in this process wake the waiter as soon as they finish.
+        Any other job has either finished already or runs in another worker,
+        so its row is re-read every poll_seconds instead.
+        """
+        event = self._events.get(job_id)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            return
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            async with AsyncSessionLocal() as db:
+                status = await db.scalar(select(FileJob.status).where(FileJob.id == job_id))
+            remaining = deadline - loop.time()
+            if status not in ACTIVE_STATUSES or remaining <= 0:
+                return
+            await asyncio.sleep(min(self.poll_seconds, remaining))
+
+    def abandoned(self, now: datetime):
+        """Condition matching active jobs whose worker has stopped heartbeating"""
+        return (
+            FileJob.status.in_(ACTIVE_STATUSES)
+            & or_(FileJob.worker_id.is_(None), FileJob.worker_id != self.worker_id)
+            & or_(
+                FileJob.heartbeat_at.is_(None),
+                FileJob.heartbeat_at < now - timedelta(seconds=self.stale_seconds)
+            )
+        )
+
+    async def _fail_abandoned_jobs(self) -> None:
+        # Handlers are not persisted, so jobs lost with their worker cannot
+        # be resumed
+        now = datetime.now(timezone.utc)
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(FileJob).where(self.abandoned(now)).values(
+                    status="failed",
+                    error="Processing was interrupted, please upload the file again",
+                    completed_at=now
+                )
+            )
+            await db.commit()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                async with AsyncSessionLocal() as db:
+                    # updated_at tracks status changes, not heartbeats
+                    await db.execute(
+                        update(FileJob).where(
+                            FileJob.worker_id == self.worker_id,
+                            FileJob.status.in_(ACTIVE_STATUSES)
+                        ).values(heartbeat_at=datetime.now(timezone.utc), updated_at=FileJob.updated_at)
+                    )
+                    await db.commit()
+                await self._fail_abandoned_jobs()
+            except Exception as e:
+                print(f"File job heartbeat error: {e}")
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, handler = await self._queue.get()
+            try:
+                await self._run(job_id, handler)
+            except Exception as e:
+                print(f"File job error: {e}")
+            finally:
+                self._queue.task_done()
+                event = self._events.pop(job_id, None)
+                if event is not None:
+                    event.set()
+
+    async def _run(self, job_id: str, handler: JobHandler) -> None:
+        await self._update(job_id, status="processing")
+
+        try:
+            result = await handler()
+        except HTTPException as e:
+            await self._finish(job_id, status="failed", error=str(e.detail))
+        except Exception as e:
+            await self._finish(job_id, status="failed", error=f"Error processing file: {str(e)}")
+        else:
+            await self._finish(job_id, status="completed", **result)
+
+    async def _finish(self, job_id: str, **fields: Any) -> None:
+        await self._update(job_id, completed_at=datetime.now(timezone.utc), **fields)
+
+    async def _update(self, job_id: str, **fields: Any) -> None:
+        async with AsyncSessionLocal() as db:
+            job = await db.get(FileJob, job_id)
+            if job is None:
+                return
+            for name, value in fields.items():
+                setattr(job, name, value)
+            await db.commit()
+
+# Global file job queue instance
+file_job_queue = FileJobQueue(
+    workers=settings.file_job_workers,
+    max_queue=settings.file_job_max_queue,
+    heartbeat_seconds=settings.file_job_heartbeat_seconds,
+    stale_seconds=settings.file_job_stale_seconds,
+    poll_seconds=settings.file_job_poll_seconds
+)
+
+registry.gauge(
+    "file_jobs_queued",
+    "File jobs waiting for a worker",
+    lambda: {(): file_job_queue.qsize()}
+)
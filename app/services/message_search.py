@@ -0,0 +1,125 @@
+from typing import Any, Dict, List, Tuple
+import re
+from sqlalchemy import DDL, event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.message import Message as MessageModel
+
+# SQLite keeps an FTS5 index over messages.content that is maintained by
+# triggers; Postgres uses a GIN expression index instead, which the database
+# keeps in sync on its own. The Alembic migrations create the same objects for
+# existing databases.
+#
+# messages has a string primary key, so its implicit rowid may be renumbered
+# by VACUUM. messages_fts_ids instead gives every message a stable integer key
+# (an INTEGER PRIMARY KEY survives VACUUM) that is used as the FTS5 rowid.
+# Keys are allocated per user as (user_id << 32) + n, so a user's messages
+# form one rowid range and FTS5 seeks straight to it instead of walking every
+# user's matches. The prefix index keeps search-as-you-type queries on short
+# prefixes from merging the doclists of every matching term.
+SQLITE_FTS_DDL = [
+    """CREATE TABLE IF NOT EXISTS messages_fts_ids (
+        rowid INTEGER PRIMARY KEY,
+        message_id VARCHAR NOT NULL UNIQUE
+    )""",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(content, prefix='2 3')",
+    """CREATE TRIGGER IF NOT EXISTS messages_fts_ai AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts_ids(rowid, message_id)
+        SELECT COALESCE(
+            (SELECT i.rowid FROM messages_fts_ids i
+             WHERE i.rowid BETWEEN c.user_id << 32 AND (c.user_id << 32) + 4294967295
+             ORDER BY i.rowid DESC LIMIT 1),
+            c.user_id << 32
+        ) + 1, new.id
+        FROM chats c WHERE c.id = new.chat_id;
+        INSERT INTO messages_fts(rowid, content)
+        SELECT rowid, new.content FROM messages_fts_ids WHERE message_id = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS messages_fts_ad AFTER DELETE ON messages BEGIN
+        DELETE FROM messages_fts WHERE rowid = (SELECT rowid FROM messages_fts_ids WHERE message_id = old.id);
+        DELETE FROM messages_fts_ids WHERE message_id = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS messages_fts_au AFTER UPDATE OF content ON messages BEGIN
+        UPDATE messages_fts SET content = new.content
+        WHERE rowid = (SELECT rowid FROM messages_fts_ids WHERE message_id = new.id);
+    END""",
+]
+
+POSTGRES_FTS_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_messages_content_fts ON messages USING gin (to_tsvector('simple', content))",
+]
+
+for statement in SQLITE_FTS_DDL:
+    event.listen(MessageModel.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in POSTGRES_FTS_DDL:
+    event.listen(MessageModel.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+SQLITE_SEARCH_SQL = text("""
+    SELECT m.id, m.chat_id, m.content, m.role, m.timestamp,
+           snippet(messages_fts, 0, '[', ']', '...', 16) AS snippet,
+           bm25(messages_fts) AS rank
+    FROM messages_fts
+    JOIN messages_fts_ids i ON i.rowid = messages_fts.rowid
+    JOIN messages m ON m.id = i.message_id
+    WHERE messages_fts MATCH :query
+      AND messages_fts.rowid BETWEEN :first_rowid AND :last_rowid
+    ORDER BY rank
+    LIMIT :limit OFFSET :offset
+""")
+
+POSTGRES_SEARCH_SQL = text("""
+    SELECT m.id, m.chat_id, m.content, m.role, m.timestamp,
+           ts_headline('simple', m.content, q, 'StartSel=[, StopSel=], MaxFragments=1, MaxWords=16') AS snippet,
+           ts_rank(to_tsvector('simple', m.content), q) AS rank
+    FROM messages m
+    JOIN chats c ON c.id = m.chat_id,
+         plainto_tsquery('simple', :query) q
+    WHERE to_tsvector('simple', m.content) @@ q AND c.user_id = :user_id
+    ORDER BY rank DESC
+    LIMIT :limit OFFSET :offset
+""")
+
+TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+def to_fts5_query(query: str) -> str:
+    """
+    Turn free text into a safe FTS5 query
+
+    Every word is quoted so user input can never use FTS5 operators, and the
+    last word matches as a prefix for search-as-you-type.
+    """
+    terms = [f'"{term}"' for term in TERM_PATTERN.findall(query)]
+    if terms:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+def user_rowid_range(user_id: int) -> Tuple[int, int]:
+    """First and last messages_fts rowid that can belong to the user"""
+    first = user_id << 32
+    return first, first + 0xFFFFFFFF
+
+async def search_messages(db: AsyncSession, user_id: int, query: str, limit: int, offset: int) -> List[Dict[str, Any]]:
+    """Ranked full-text search over the messages in a user's chats"""
+    dialect = db.bind.dialect.name
+    
+    if dialect == "sqlite":
+        statement = SQLITE_SEARCH_SQL
+        query = to_fts5_query(query)
+        if not query:
+            return []
+    elif dialect == "postgresql":
+        statement = POSTGRES_SEARCH_SQL
+    else:
+        raise NotImplementedError(f"Message search is not supported on {dialect}")
+    
+    first_rowid, last_rowid = user_rowid_range(user_id)
+    result = await db.execute(statement, {
+        "query": query,
+        "user_id": user_id,
+        "first_rowid": first_rowid,
+        "last_rowid": last_rowid,
+        "limit": limit,
+        "offset": offset
+    })
+    rows = result.mappings().all()
+    
+    return [dict(row) for row in rows]
\ No newline at end of file
@@ -0,0 +1,322 @@
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Sequence, TypeVar
+from collections import deque
+import asyncio
+import random
+import time
+import httpx
+import openai
+from openai import AsyncOpenAI
+from ..core.config import settings, AIProvider
+from ..core.metrics import ai_hedged_requests, ai_retries
+from .circuit_breaker import CircuitBreaker
+
+T = TypeVar("T")
+
+# Successful call latencies kept per provider for the hedge delay
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+# Weight of the latest call in the failure rate moving average
+FAILURE_DECAY = 0.2
+
+# A failing provider keeps a small share of traffic so recovery is noticed
+MIN_HEALTH = 0.05
+
+class AIServiceError(Exception):
+    """Raised when no AI provider produced an answer"""
+
+    def __init__(self, detail: str, retry_after: Optional[float] = None):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+
+class AIServiceUnavailable(AIServiceError):
+    """Raised when every provider failed or has an open circuit"""
+
+class AIServiceTimeout(AIServiceError):
+    """Raised when a call does not finish within its deadline"""
+
+def is_retryable(error: BaseException) -> bool:
+    """Connection errors, timeouts, rate limits and server errors are worth retrying"""
+    if isinstance(error, (openai.APIConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+class Provider:
+    """One OpenAI-compatible backend and its observed health"""
+
+    def __init__(
+        self,
+        name: str,
+        model: str,
+        weight: float,
+        client: AsyncOpenAI,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.name = name
+        self.model = model
+        self.weight = weight
+        self.client = client
+        self.breaker = breaker or CircuitBreaker(failure_threshold=5, reset_seconds=30.0)
+        self.failure_rate = 0.0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    @property
+    def health(self) -> float:
+        return max(MIN_HEALTH, 1.0 - self.failure_rate)
+
+    def record_success(self, latency: Optional[float] = None) -> None:
+        self.failure_rate *= 1 - FAILURE_DECAY
+        self.breaker.record_success()
+        if latency is not None:
+            self.latencies.append(latency)
+
+    def record_failure(self) -> None:
+        self.failure_rate = self.failure_rate * (1 - FAILURE_DECAY) + FAILURE_DECAY
+        self.breaker.record_failure()
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        if len(self.latencies) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(percentile * len(ordered)))]
+
+class ProviderRouter:
+    """
+    Weighted, health-scored routing over the configured providers
+
+    Each call goes to a provider picked at random by weight times health,
+    skipping providers whose circuit is open. A call that fails with a
+    retryable error is retried at once on a provider not tried yet, or
+    after a jittered backoff once all of them have been tried, up to
+    max_attempts calls in total. A hedged call that is still running after
+    the provider's p95 latency is also started on a second provider, and
+    whichever answers first wins while the other is cancelled. Hedges are
+    skipped while hedge_allowed() is false, so a local backlog is not made
+    worse by extra provider calls.
+
+    Every attempt is limited to attempt_timeout and the whole call,
+    retries included, to deadline.
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[Provider],
+        hedge_enabled: bool = True,
+        hedge_percentile: float = 0.95,
+        hedge_initial_delay: float = 10.0,
+        hedge_min_delay: float = 1.0,
+        max_attempts: int = 3,
+        attempt_timeout: float = 45.0,
+        deadline: float = 90.0,
+        backoff: float = 0.5,
+        backoff_max: float = 4.0,
+        hedge_allowed: Optional[Callable[[], bool]] = None
+    ):
+        if not providers:
+            raise ValueError("At least one AI provider is required")
+        self.providers = list(providers)
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.hedge_initial_delay = hedge_initial_delay
+        self.hedge_min_delay = hedge_min_delay
+        self.max_attempts = max(1, max_attempts)
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.hedge_allowed = hedge_allowed or (lambda: True)
+
+    @property
+    def primary(self) -> Provider:
+        return self.providers[0]
+
+    def choose(self, exclude: Sequence[Provider] = ()) -> Optional[Provider]:
+        candidates = [
+            provider for provider in self.providers
+            if provider not in exclude and provider.breaker.can_attempt()
+        ]
+        if not candidates:
+            return None
+        weights = [provider.weight * provider.health for provider in candidates]
+        provider = random.choices(candidates, weights=weights)[0]
+        provider.breaker.allow()
+        return provider
+
+    def retry_after(self) -> float:
+        """Seconds until some provider's circuit lets a call through again"""
+        return min(provider.breaker.retry_after() for provider in self.providers)
+
+    def backoff_delay(self, retry: int) -> float:
+        # Full jitter keeps retries from many callers from arriving together
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2 ** retry))
+
+    def hedge_delay(self, provider: Provider) -> float:
+        observed = provider.latency_percentile(self.hedge_percentile)
+        return max(self.hedge_min_delay, observed if observed is not None else self.hedge_initial_delay)
+
+    async def _timed(
+        self,
+        provider: Provider,
+        call: Callable[[Provider], Awaitable[T]],
+        record_latency: bool
+    ) -> T:
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(call(provider), self.attempt_timeout)
+        except asyncio.CancelledError:
+            # Losing a hedge says nothing about the provider's health
+            provider.breaker.release()
+            raise
+        except Exception as e:
+            if is_retryable(e):
+                provider.record_failure()
+            else:
+                # The provider answered; the request itself was rejected
+                provider.record_success()
+            raise
+        provider.record_success(time.perf_counter() - start if record_latency else None)
+        return result
+
+    async def run(self, call: Callable[[Provider], Awaitable[T]], hedge: bool = True) -> T:
+        """
+        Run call(provider) until one provider succeeds
+
+        call must go straight to the provider: the attempt timeout and the
+        provider's health cover everything it awaits, so callers acquire
+        local resources such as concurrency slots before calling run().
+        Only hedged calls record latency samples, since those drive the
+        hedge delay. Raises AIServiceUnavailable when no provider can be
+        tried or all attempts failed, AIServiceTimeout when the deadline
+        passes, and AIServiceError for errors that retrying cannot fix.
+        """
+        hedge = hedge and self.hedge_enabled
+        deadline = time.monotonic() + self.deadline
+        tried: List[Provider] = []
+        pending: Dict[asyncio.Task, Provider] = {}
+        last_error: Optional[BaseException] = None
+        attempts = 0
+        retries = 0
+        hedged = False
+
+        def launch() -> bool:
+            nonlocal attempts
+            if attempts >= self.max_attempts:
+                return False
+            provider = self.choose(exclude=tried)
+            if provider is None:
+                return False
+            attempts += 1
+            tried.append(provider)
+            pending[asyncio.create_task(self._timed(provider, call, hedge))] = provider
+            return True
+
+        if not launch():
+            raise AIServiceUnavailable(
+                "AI service is temporarily unavailable", retry_after=self.retry_after()
+            )
+        first_task = next(iter(pending))
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise AIServiceTimeout(f"AI service did not respond within {self.deadline:.0f}s")
+
+                can_hedge = hedge and len(pending) == 1 and len(tried) < len(self.providers)
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=min(remaining, self.hedge_delay(tried[-1])) if can_hedge else remaining,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # The call is slower than usual for its provider
+                    if can_hedge and time.monotonic() < deadline and self.hedge_allowed():
+                        hedged = launch() or hedged
+                    continue
+
+                for task in done:
+                    pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        if hedged:
+                            ai_hedged_requests.inc(winner="primary" if task is first_task else "hedge")
+                        return task.result()
+                    if not is_retryable(error):
+                        if isinstance(error, openai.OpenAIError):
+                            raise AIServiceError(f"AI provider rejected the request: {error}") from error
+                        raise error
+                    last_error = error
+
+                if pending or launch():
+                    continue
+
+                # Every available provider has been tried; back off and
+                # start another round
+                if attempts >= self.max_attempts:
+                    break
+                delay = self.backoff_delay(retries)
+                if time.monotonic() + delay >= deadline:
+                    break
+                retries += 1
+                ai_retries.inc()
+                await asyncio.sleep(delay)
+                tried.clear()
+                if not launch():
+                    break
+
+            raise AIServiceUnavailable(
+                f"AI service is temporarily unavailable: {last_error}",
+                retry_after=self.retry_after()
+            ) from last_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+def build_provider_router(
+    http_client: httpx.AsyncClient,
+    hedge_allowed: Optional[Callable[[], bool]] = None
+) -> ProviderRouter:
+    """Create the provider router configured in settings"""
+    configured = settings.ai_providers or [
+        AIProvider(
+            name="default",
+            base_url=settings.ai_base_url,
+            api_key=settings.ai_api_key,
+            model=settings.ai_model
+        )
+    ]
+    providers = [
+        Provider(
+            name=provider.name,
+            model=provider.model,
+            weight=provider.weight,
+            # Providers share the pooled HTTP client and its connection limits;
+            # the router fails over instead of the client retrying internally
+            client=AsyncOpenAI(
+                base_url=provider.base_url,
+                api_key=provider.api_key or settings.ai_api_key,
+                http_client=http_client,
+                max_retries=0,
+            ),
+            breaker=CircuitBreaker(
+                failure_threshold=settings.ai_circuit_failure_threshold,
+                reset_seconds=settings.ai_circuit_reset_seconds
+            )
+        )
+        for provider in configured
+    ]
+    return ProviderRouter(
+        providers,
+        hedge_enabled=settings.ai_hedge_enabled,
+        hedge_percentile=settings.ai_hedge_percentile,
+        hedge_initial_delay=settings.ai_hedge_initial_delay_seconds,
+        hedge_min_delay=settings.ai_hedge_min_delay_seconds,
+        max_attempts=settings.ai_max_attempts,
+        attempt_timeout=settings.ai_attempt_timeout_seconds,
+        deadline=settings.ai_deadline_seconds,
+        backoff=settings.ai_retry_backoff_seconds,
+        backoff_max=settings.ai_retry_backoff_max_seconds,
+        hedge_allowed=hedge_allowed
+    )
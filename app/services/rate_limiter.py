@@ -0,0 +1,296 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from contextlib import contextmanager
+import sqlite3
+import threading
+import time
+import uuid
+from starlette.concurrency import run_in_threadpool
+from ..core.config import settings
+from ..core.metrics import rate_limit_rejections
+
+# (key, capacity, tokens refilled per second)
+BucketSpec = Tuple[str, float, float]
+
+GLOBAL_KEY = "global"
+
+# Retry-After hint when a user is at their in-flight cap; the slot frees up
+# as soon as one of their running AI calls finishes
+IN_FLIGHT_RETRY_AFTER_SECONDS = 5
+
+class RateLimitExceeded(Exception):
+    """Raised when a request is over a token bucket or the in-flight cap"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Rate limit exceeded ({reason}), retry after {retry_after:.1f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+def _refill(tokens: float, updated_at: float, capacity: float, rate: float, now: float) -> float:
+    return min(capacity, tokens + max(0.0, now - updated_at) * rate)
+
+def _check_buckets(levels: Sequence[Tuple[BucketSpec, float]]) -> Tuple[float, Optional[str]]:
+    """Longest wait until every bucket holds a token, and the bucket causing it"""
+    wait, limiting_key = 0.0, None
+    for (key, _, rate), tokens in levels:
+        if tokens < 1 and (1 - tokens) / rate > wait:
+            wait, limiting_key = (1 - tokens) / rate, key
+    return wait, limiting_key
+
+class MemoryRateLimitBackend:
+    """Token buckets and in-flight counts held in this process"""
+
+    # Calls only touch dicts, so they run on the event loop
+    blocking = False
+
+    def __init__(self):
+        # key -> (tokens, updated_at, full_at)
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._last_prune = time.monotonic()
+
+    def take(self, buckets: Sequence[BucketSpec]) -> Tuple[float, Optional[str]]:
+        """
+        Take one token from every bucket, or none if any of them is empty
+
+        Returns (0, None) on success, otherwise the seconds until a retry can
+        succeed and the key of the bucket that is empty.
+        """
+        now = time.monotonic()
+        levels = []
+        for spec in buckets:
+            key, capacity, rate = spec
+            entry = self._buckets.get(key)
+            tokens = capacity if entry is None else _refill(entry[0], entry[1], capacity, rate, now)
+            levels.append((spec, tokens))
+
+        wait, limiting_key = _check_buckets(levels)
+        if limiting_key is not None:
+            return wait, limiting_key
+
+        for (key, capacity, rate), tokens in levels:
+            tokens -= 1
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+        self._prune(now)
+        return 0.0, None
+
+    def _prune(self, now: float) -> None:
+        # A bucket that has refilled completely is the same as no bucket
+        if now - self._last_prune < 60:
+            return
+        self._last_prune = now
+        for key in [key for key, entry in self._buckets.items() if entry[2] <= now]:
+            del self._buckets[key]
+
+    def acquire(self, key: str, limit: int, lease_seconds: float) -> Optional[str]:
+        """Take an in-flight slot for key; returns a lease id, or None at the limit"""
+        count = self._in_flight.get(key, 0)
+        if count >= limit:
+            return None
+        self._in_flight[key] = count + 1
+        return uuid.uuid4().hex
+
+    def release(self, key: str, lease_id: str) -> None:
+        count = self._in_flight.get(key, 0) - 1
+        if count > 0:
+            self._in_flight[key] = count
+        else:
+            self._in_flight.pop(key, None)
+
+class SQLiteRateLimitBackend:
+    """
+    Token buckets and in-flight leases shared between worker processes
+
+    Leases expire after lease_seconds so slots held by a crashed worker are
+    eventually returned.
+    """
+
+    # Calls wait on the database lock held by other workers (up to the
+    # connection timeout), so they run in the threadpool
+    blocking = True
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                full_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS rate_limit_leases (
+                id TEXT PRIMARY KEY,
+                key TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_rate_limit_leases_key ON rate_limit_leases (key)"
+        )
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers
+        # cannot both read a bucket before either has updated it
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def take(self, buckets: Sequence[BucketSpec]) -> Tuple[float, Optional[str]]:
+        now = time.time()
+        with self._transaction():
+            levels = []
+            for spec in buckets:
+                key, capacity, rate = spec
+                row = self._conn.execute(
+                    "SELECT tokens, updated_at FROM rate_limit_buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens = capacity if row is None else _refill(row[0], row[1], capacity, rate, now)
+                levels.append((spec, tokens))
+
+            wait, limiting_key = _check_buckets(levels)
+            if limiting_key is not None:
+                return wait, limiting_key
+
+            for (key, capacity, rate), tokens in levels:
+                tokens -= 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated_at, full_at) VALUES (?, ?, ?, ?)",
+                    (key, tokens, now, now + (capacity - tokens) / rate)
+                )
+            self._conn.execute("DELETE FROM rate_limit_buckets WHERE full_at <= ?", (now,))
+        return 0.0, None
+
+    def acquire(self, key: str, limit: int, lease_seconds: float) -> Optional[str]:
+        now = time.time()
+        with self._transaction():
+            self._conn.execute("DELETE FROM rate_limit_leases WHERE expires_at <= ?", (now,))
+            count = self._conn.execute(
+                "SELECT COUNT(*) FROM rate_limit_leases WHERE key = ?", (key,)
+            ).fetchone()[0]
+            if count >= limit:
+                return None
+
+            lease_id = uuid.uuid4().hex
+            self._conn.execute(
+                "INSERT INTO rate_limit_leases (id, key, expires_at) VALUES (?, ?, ?)",
+                (lease_id, key, now + lease_seconds)
+            )
+        return lease_id
+
+    def release(self, key: str, lease_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM rate_limit_leases WHERE id = ?", (lease_id,))
+
+class RateLimiter:
+    """
+    Per-user and global token buckets plus a per-user in-flight cap
+
+    Buckets hold `burst` tokens and refill at `per_minute`; a limit of 0
+    disables that bucket or cap.
+    """
+
+    def __init__(
+        self,
+        backend,
+        user_per_minute: float,
+        user_burst: int,
+        global_per_minute: float,
+        global_burst: int,
+        max_in_flight: int,
+        lease_seconds: float
+    ):
+        self.backend = backend
+        self.user_per_minute = user_per_minute
+        self.user_burst = user_burst
+        self.global_per_minute = global_per_minute
+        self.global_burst = global_burst
+        self.max_in_flight = max_in_flight
+        self.lease_seconds = lease_seconds
+
+    def _buckets(self, user_key: str) -> List[BucketSpec]:
+        buckets = []
+        if self.user_per_minute > 0:
+            buckets.append((user_key, max(1, self.user_burst), self.user_per_minute / 60))
+        if self.global_per_minute > 0:
+            buckets.append((GLOBAL_KEY, max(1, self.global_burst), self.global_per_minute / 60))
+        return buckets
+
+    async def acquire(self, user_id: int, limit_in_flight: bool = True) -> Optional[str]:
+        """
+        Admit one request for the user or raise RateLimitExceeded
+
+        Returns the in-flight lease to pass to release() once the request
+        has finished, or None when no slot was taken.
+        """
+        try:
+            if self.backend.blocking:
+                return await run_in_threadpool(self._acquire, user_id, limit_in_flight)
+            return self._acquire(user_id, limit_in_flight)
+        except RateLimitExceeded as e:
+            # Counted here rather than in _acquire, which may run on a worker
+            # thread; metrics are only updated from the event loop thread
+            rate_limit_rejections.inc(reason=e.reason)
+            raise
+
+    async def release(self, user_id: int, lease_id: Optional[str]) -> None:
+        if lease_id is None:
+            return
+        if self.backend.blocking:
+            await run_in_threadpool(self._release, user_id, lease_id)
+        else:
+            self._release(user_id, lease_id)
+
+    def _acquire(self, user_id: int, limit_in_flight: bool) -> Optional[str]:
+        user_key = f"user:{user_id}"
+        lease_id = None
+        # The in-flight slot is checked first so a rejected request does not
+        # spend tokens
+        if limit_in_flight and self.max_in_flight > 0:
+            lease_id = self.backend.acquire(user_key, self.max_in_flight, self.lease_seconds)
+            if lease_id is None:
+                raise RateLimitExceeded("in_flight", IN_FLIGHT_RETRY_AFTER_SECONDS)
+
+        wait, limiting_key = self.backend.take(self._buckets(user_key))
+        if limiting_key is not None:
+            if lease_id is not None:
+                self._release(user_id, lease_id)
+            reason = "global" if limiting_key == GLOBAL_KEY else "user"
+            raise RateLimitExceeded(reason, wait)
+        return lease_id
+
+    def _release(self, user_id: int, lease_id: str) -> None:
+        self.backend.release(f"user:{user_id}", lease_id)
+
+def build_rate_limiter() -> Optional[RateLimiter]:
+    """Create the rate limiter configured in settings, if enabled"""
+    if not settings.rate_limit_enabled:
+        return None
+
+    if settings.rate_limit_backend == "sqlite":
+        backend = SQLiteRateLimitBackend(settings.rate_limit_sqlite_path)
+    elif settings.rate_limit_backend == "memory":
+        backend = MemoryRateLimitBackend()
+    else:
+        raise ValueError(f"Unknown rate limit backend: {settings.rate_limit_backend}")
+
+    return RateLimiter(
+        backend,
+        user_per_minute=settings.rate_limit_user_per_minute,
+        user_burst=settings.rate_limit_user_burst,
+        global_per_minute=settings.rate_limit_global_per_minute,
+        global_burst=settings.rate_limit_global_burst,
+        max_in_flight=settings.rate_limit_user_max_in_flight,
+        lease_seconds=settings.rate_limit_lease_seconds
+    )
+
+# Global rate limiter instance
+rate_limiter = build_rate_limiter()
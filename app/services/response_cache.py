@@ -0,0 +1,186 @@
+from typing import List, Dict, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from starlette.concurrency import run_in_threadpool
+from ..core.config import settings
+
+# Hits refresh a SQLite entry's access time at most this often, so most
+# lookups are read-only; LRU order only needs to be roughly right
+ACCESS_RESOLUTION_SECONDS = 60
+
+class MemoryCacheBackend:
+    """In-process LRU store with per-entry expiry"""
+
+    # Calls only touch a dict, so they run on the event loop
+    blocking = False
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        self._entries[key] = (time.time() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class SQLiteCacheBackend:
+    """SQLite-backed LRU store shared between worker processes"""
+
+    # Calls may wait on the database lock held by other workers, so they run
+    # in the threadpool
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_response_cache_accessed_at ON response_cache (accessed_at)"
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at, accessed_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, expires_at, accessed_at = row
+            if expires_at <= now:
+                self._conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                return None
+
+            if now - accessed_at >= ACCESS_RESOLUTION_SECONDS:
+                self._conn.execute(
+                    "UPDATE response_cache SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+            return value
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl_seconds, now)
+            )
+            # Drop expired rows first, then the least recently used overflow
+            self._conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                """DELETE FROM response_cache WHERE key IN (
+                    SELECT key FROM response_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_entries,)
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+class ResponseCache:
+    """Content-addressed cache of AI completions keyed on model and prompt"""
+
+    def __init__(self, backend, ttl_seconds: int):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]]) -> str:
+        """
+        Hash the model and normalized message list into a cache key
+
+        Role names are lower-cased and whitespace runs in the content are
+        collapsed so formatting-only differences map to the same entry.
+        """
+        normalized = [
+            {
+                "role": msg.get("role", "user").strip().lower(),
+                "content": " ".join(msg.get("content", "").split())
+            }
+            for msg in messages
+        ]
+        payload = json.dumps({"model": model, "messages": normalized}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def _call(self, method, *args):
+        if self.backend.blocking:
+            return await run_in_threadpool(method, *args)
+        return method(*args)
+
+    async def get(self, model: str, messages: List[Dict[str, str]]) -> Optional[str]:
+        value = await self._call(self.backend.get, self.make_key(model, messages))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, model: str, messages: List[Dict[str, str]], value: str) -> None:
+        await self._call(self.backend.set, self.make_key(model, messages), value, self.ttl_seconds)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.backend),
+        }
+
+def build_response_cache() -> Optional[ResponseCache]:
+    """Create the response cache configured in settings, if enabled"""
+    if not settings.response_cache_enabled:
+        return None
+
+    if settings.response_cache_backend == "sqlite":
+        backend = SQLiteCacheBackend(
+            settings.response_cache_sqlite_path,
+            max_entries=settings.response_cache_max_entries
+        )
+    elif settings.response_cache_backend == "memory":
+        backend = MemoryCacheBackend(max_entries=settings.response_cache_max_entries)
+    else:
+        raise ValueError(f"Unknown response cache backend: {settings.response_cache_backend}")
+
+    return ResponseCache(backend, ttl_seconds=settings.response_cache_ttl_seconds)
@@ -0,0 +1,142 @@
+from typing import Dict, List, Optional
+import re
+import threading
+import time
+import zlib
+import numpy as np
+from ..core.config import settings
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+class HashingVectorizer:
+    """Embed text as signed, hashed unigram and bigram counts"""
+
+    def __init__(self, dimensions: int = 512):
+        self.dimensions = dimensions
+
+    def _features(self, text: str) -> List[str]:
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        bigrams = [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        return tokens + bigrams
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature in self._features(text):
+            # crc32 is stable across processes, unlike the builtin hash()
+            h = zlib.crc32(feature.encode("utf-8"))
+            sign = 1.0 if h & 0x80000000 else -1.0
+            vector[h % self.dimensions] += sign
+
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+class SemanticIndex:
+    """Bounded NumPy index of unit vectors with their cached answers"""
+
+    def __init__(self, dimensions: int, max_entries: int, initial_capacity: int = 1024):
+        self.max_entries = max_entries
+        self._vectors = np.zeros((min(initial_capacity, max_entries), dimensions), dtype=np.float32)
+        self._answers: List[Optional[str]] = []
+        self._expires_at = np.zeros(self._vectors.shape[0], dtype=np.float64)
+        self._next = 0
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+    def _grow(self) -> None:
+        capacity = min(self._vectors.shape[0] * 2, self.max_entries)
+        vectors = np.zeros((capacity, self._vectors.shape[1]), dtype=np.float32)
+        vectors[:len(self._answers)] = self._vectors[:len(self._answers)]
+        expires_at = np.zeros(capacity, dtype=np.float64)
+        expires_at[:len(self._answers)] = self._expires_at[:len(self._answers)]
+        self._vectors = vectors
+        self._expires_at = expires_at
+
+    def add(self, vector: np.ndarray, answer: str, ttl_seconds: int) -> None:
+        if len(self._answers) < self.max_entries:
+            if len(self._answers) == self._vectors.shape[0]:
+                self._grow()
+            slot = len(self._answers)
+            self._answers.append(answer)
+        else:
+            # Full: overwrite the oldest entry ring-buffer style
+            slot = self._next
+            self._answers[slot] = answer
+        self._next = (slot + 1) % self.max_entries
+
+        self._vectors[slot] = vector
+        self._expires_at[slot] = time.time() + ttl_seconds
+
+    def search(self, vector: np.ndarray, threshold: float) -> Optional[str]:
+        size = len(self._answers)
+        if size == 0:
+            return None
+
+        scores = self._vectors[:size] @ vector
+        scores[self._expires_at[:size] <= time.time()] = -1.0
+        best = int(np.argmax(scores))
+        if scores[best] >= threshold:
+            return self._answers[best]
+        return None
+
+class SemanticCache:
+    """
+    Near-duplicate question cache using cosine similarity of local embeddings
+
+    A lookup scores the question against every entry in its namespace, so
+    callers on the event loop should run get() and set() in the threadpool;
+    the lock keeps an entry's vector and answer consistent while a scan runs.
+    """
+
+    def __init__(self, threshold: float, dimensions: int, max_entries: int, ttl_seconds: int):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.vectorizer = HashingVectorizer(dimensions)
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, SemanticIndex] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _index(self, namespace: str) -> SemanticIndex:
+        index = self._indexes.get(namespace)
+        if index is None:
+            index = SemanticIndex(self.vectorizer.dimensions, self.max_entries)
+            self._indexes[namespace] = index
+        return index
+
+    def get(self, namespace: str, question: str) -> Optional[str]:
+        vector = self.vectorizer.embed(question)
+        with self._lock:
+            answer = self._index(namespace).search(vector, self.threshold)
+            if answer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return answer
+
+    def set(self, namespace: str, question: str, answer: str) -> None:
+        vector = self.vectorizer.embed(question)
+        with self._lock:
+            self._index(namespace).add(vector, answer, self.ttl_seconds)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": sum(len(index) for index in list(self._indexes.values())),
+        }
+
+def build_semantic_cache() -> Optional[SemanticCache]:
+    """Create the semantic cache configured in settings, if enabled"""
+    if not settings.semantic_cache_enabled:
+        return None
+
+    return SemanticCache(
+        threshold=settings.semantic_cache_threshold,
+        dimensions=settings.semantic_cache_dimensions,
+        max_entries=settings.semantic_cache_max_entries,
+        ttl_seconds=settings.semantic_cache_ttl_seconds
+    )
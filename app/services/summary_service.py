@@ -0,0 +1,79 @@
+from typing import Optional, Set
+from sqlalchemy import and_, func, or_, select, true
+from app.core.config import settings
+from app.database import AsyncSessionLocal
+from app.models.message import Message as MessageModel
+from app.models.chat_summary import ChatSummary
+from app.services.ai_service import ai_service
+
+# Chats whose summary is currently being rebuilt in this process
+_in_progress: Set[str] = set()
+
+def after_summary(summary: Optional[ChatSummary]):
+    """
+    Condition matching the messages not yet folded into the summary
+
+    The summary stores the (timestamp, id) of the last message it covers,
+    so deleting older messages does not shift which ones are summarized.
+    """
+    if summary is None or summary.last_message_id is None:
+        return true()
+    return or_(
+        MessageModel.timestamp > summary.last_message_at,
+        and_(
+            MessageModel.timestamp == summary.last_message_at,
+            MessageModel.id > summary.last_message_id
+        )
+    )
+
+async def update_chat_summary(chat_id: str) -> None:
+    """
+    Fold older messages of a chat into its rolling summary
+    
+    Runs as a background task after each turn. The summary is only extended
+    once at least summary_interval_messages new messages have fallen outside
+    the most recent summary_keep_recent_messages, so each message is
+    summarized once and the prompt keeps a fixed number of raw turns.
+    """
+    if not settings.summary_enabled or chat_id in _in_progress:
+        return
+    
+    _in_progress.add(chat_id)
+    try:
+        async with AsyncSessionLocal() as db:
+            summary = await db.get(ChatSummary, chat_id)
+            unsummarized = select(MessageModel).where(
+                MessageModel.chat_id == chat_id,
+                after_summary(summary)
+            )
+            
+            pending = await db.scalar(select(func.count()).select_from(unsummarized.subquery()))
+            foldable = pending - settings.summary_keep_recent_messages
+            if foldable < settings.summary_interval_messages:
+                return
+            
+            new_messages = (await db.scalars(
+                unsummarized.order_by(MessageModel.timestamp.asc(), MessageModel.id.asc()).limit(foldable)
+            )).all()
+            
+            try:
+                text = await ai_service.summarize_conversation(
+                    summary.summary if summary else "",
+                    [{"role": msg.role, "content": msg.content} for msg in new_messages]
+                )
+            except Exception as e:
+                print(f"Chat summary error: {e}")
+                return
+            
+            if not text:
+                return
+            
+            if summary is None:
+                summary = ChatSummary(chat_id=chat_id)
+                db.add(summary)
+            summary.summary = text.strip()
+            summary.last_message_at = new_messages[-1].timestamp
+            summary.last_message_id = new_messages[-1].id
+            await db.commit()
+    finally:
+        _in_progress.discard(chat_id)
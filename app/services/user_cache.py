@@ -0,0 +1,98 @@
+from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+import threading
+import time
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from ..core.config import settings
+from ..core.metrics import registry, register_cache_stats
+from ..models.user import User
+
+class UserCache:
+    """
+    TTL/LRU cache of active users keyed by id
+
+    Only column values are stored, never session-bound instances. A hit is
+    rebuilt as a detached User and merged into the request session without
+    loading, so handlers get a normal persistent object and no query is run.
+    Entries are dropped whenever a user row is updated or deleted through the
+    ORM; the TTL bounds staleness for changes made by other processes.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, db: AsyncSession, user_id: int) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[user_id]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            values = entry[1]
+
+        user = User(**values)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+    def set(self, user: User) -> None:
+        values = {
+            attr.key: getattr(user, attr.key)
+            for attr in inspect(User).column_attrs
+        }
+        with self._lock:
+            self._entries[user.id] = (time.time() + self.ttl_seconds, values)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+        }
+
+def build_user_cache() -> Optional[UserCache]:
+    """Create the user cache configured in settings, if enabled"""
+    if not settings.user_cache_enabled:
+        return None
+
+    return UserCache(
+        ttl_seconds=settings.user_cache_ttl_seconds,
+        max_entries=settings.user_cache_max_entries
+    )
+
+# Global user cache instance
+user_cache = build_user_cache()
+
+register_cache_stats(
+    registry,
+    "user_cache",
+    "Authenticated user cache",
+    lambda: user_cache.stats() if user_cache else None
+)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target: User) -> None:
+    if user_cache is not None:
+        user_cache.invalidate(target.id)
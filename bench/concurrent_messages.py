@@ -0,0 +1,105 @@
+"""
+Concurrent /messages/ load test against a fake OpenAI server
+
+Sends --requests messages at once, each to its own chat, while the AI
+backend takes --delay seconds per completion. With a non-blocking client the
+completions overlap, so the whole batch takes about one delay instead of
+one delay per request, and /health keeps answering during the load.
+
+    python -m bench.concurrent_messages [--requests N] [--delay SECONDS]
+
+Exits with status 1 if the upstream calls did not overlap.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from bench.fake_openai import FakeOpenAI
+
+def configure(fake: FakeOpenAI, database_path: str) -> None:
+    # Settings are read when the app is imported, so this runs first
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{database_path}",
+        "AI_BASE_URL": fake.base_url,
+        "AI_API_KEY": "bench",
+        "AI_HEDGE_ENABLED": "false",
+        "RATE_LIMIT_ENABLED": "false",
+        "RESPONSE_CACHE_ENABLED": "false",
+        "SUMMARY_ENABLED": "false",
+    })
+
+async def run(fake: FakeOpenAI, requests: int) -> int:
+    import httpx
+    from app.main import app
+    from app.database import create_tables
+
+    create_tables()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            await client.post("/auth/register", json={
+                "email": "bench@example.com", "full_name": "Bench", "password": "bench-password"
+            })
+            login = await client.post("/auth/login", json={
+                "email": "bench@example.com", "password": "bench-password"
+            })
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            chat_ids = [
+                (await client.post("/chats/", json={"title": f"Bench {index}"}, headers=headers)).json()["id"]
+                for index in range(requests)
+            ]
+
+            health_latencies = []
+            done = asyncio.Event()
+
+            async def probe_health() -> None:
+                while not done.is_set():
+                    start = time.perf_counter()
+                    await client.get("/health")
+                    health_latencies.append(time.perf_counter() - start)
+                    await asyncio.sleep(0.05)
+
+            async def send(index: int, chat_id: str) -> int:
+                # Distinct questions, so identical in-flight completions are
+                # not coalesced into one upstream call
+                response = await client.post("/messages/", json={
+                    "chat_id": chat_id, "content": f"What is a promissory note? ({index})", "role": "user"
+                }, headers=headers)
+                return response.status_code
+
+            fake.reset()
+            probe = asyncio.create_task(probe_health())
+            start = time.perf_counter()
+            statuses = await asyncio.gather(*(send(index, chat_id) for index, chat_id in enumerate(chat_ids)))
+            elapsed = time.perf_counter() - start
+            done.set()
+            await probe
+
+    serial = requests * fake.delay
+    failed = sum(1 for code in statuses if code != 200)
+    print(f"requests            {requests} ({failed} failed)")
+    print(f"AI delay            {fake.delay:.2f}s per completion")
+    print(f"wall time           {elapsed:.2f}s (serial would be {serial:.2f}s)")
+    print(f"peak upstream calls {fake.peak_in_flight}")
+    print(f"/health latency     median {statistics.median(health_latencies) * 1000:.1f} ms, "
+          f"max {max(health_latencies) * 1000:.1f} ms over {len(health_latencies)} probes")
+
+    if failed or fake.peak_in_flight < 2 or elapsed >= serial / 2:
+        print("requests did not overlap")
+        return 1
+    return 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory, FakeOpenAI(delay=args.delay) as fake:
+        configure(fake, os.path.join(directory, "bench.db"))
+        return asyncio.run(run(fake, args.requests))
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,129 @@
+"""
+Upload extraction throughput against extractor pool size
+
+Generates PDF and Word documents, then runs them through ExtractorPool the
+way process_file does (PDFs in parallel page shards, Word documents as one
+call each) with every pool size in --workers. Throughput should grow with
+the number of workers up to the number of CPU cores.
+
+    python -m bench.extraction [--workers 1,2,4] [--documents N] [--kind process]
+
+Exits with status 1 if the largest pool reaches less than --min-efficiency
+of linear scaling over one worker.
+"""
+from typing import List
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+from docx import Document
+from app.services.extraction import ExtractorPool, extract_word_text
+
+PDF_PAGES = 64
+WORD_PARAGRAPHS = 3000
+LINES_PER_PAGE = 40
+
+def write_pdf(path: Path, pages: int) -> None:
+    """Write a minimal PDF with a page of Helvetica text per page"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page in range(pages):
+        lines = " ".join(
+            f"(Clause {page}.{line}: the borrower repays the principal with interest monthly.) Tj T*"
+            for line in range(LINES_PER_PAGE)
+        )
+        content = f"BT /F1 10 Tf 12 TL 40 800 Td {lines} ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids).encode("ascii")
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(output))
+
+def write_docx(path: Path, paragraphs: int) -> None:
+    document = Document()
+    for index in range(paragraphs):
+        document.add_paragraph(f"Article {index}: the lessee pays the rent before the fifth day of each month.")
+    document.save(path)
+
+def build_documents(directory: Path, count: int) -> List[Path]:
+    pdf, docx = directory / "sample.pdf", directory / "sample.docx"
+    write_pdf(pdf, PDF_PAGES)
+    write_docx(docx, WORD_PARAGRAPHS)
+    # Alternate the two kinds, like a mixed stream of uploads
+    return [pdf if index % 2 == 0 else docx for index in range(count)]
+
+async def extract(pool: ExtractorPool, path: Path) -> str:
+    if path.suffix == ".pdf":
+        return await pool.extract_pdf_text(path)
+    return await pool.run(extract_word_text, path)
+
+async def measure(kind: str, workers: int, documents: List[Path]) -> float:
+    """Documents per second for a pool of the given size"""
+    pool = ExtractorPool(kind=kind, workers=workers, timeout=600, max_pending=len(documents) + workers)
+    pool.start()
+    try:
+        # Start every worker process before timing
+        await asyncio.gather(*(pool.run(extract_word_text, documents[1]) for _ in range(workers)))
+        start = time.perf_counter()
+        texts = await asyncio.gather(*(extract(pool, path) for path in documents))
+        elapsed = time.perf_counter() - start
+    finally:
+        pool.stop()
+    if not all(texts):
+        raise RuntimeError("An extraction returned no text")
+    return len(documents) / elapsed
+
+def main() -> int:
+    cores = os.cpu_count() or 1
+    default_workers = sorted({1, *(2 ** power for power in range(1, cores.bit_length()) if 2 ** power <= cores), cores})
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", default=",".join(map(str, default_workers)),
+                        help="comma-separated pool sizes (default: powers of two up to the core count)")
+    parser.add_argument("--documents", type=int, default=32)
+    parser.add_argument("--kind", choices=("process", "thread"), default="process")
+    parser.add_argument("--min-efficiency", type=float, default=0.5)
+    args = parser.parse_args()
+    pool_sizes = [int(size) for size in args.workers.split(",")]
+
+    with tempfile.TemporaryDirectory() as directory:
+        documents = build_documents(Path(directory), args.documents)
+        print(f"{args.documents} documents ({PDF_PAGES}-page PDFs and {WORD_PARAGRAPHS}-paragraph Word files), "
+              f"{args.kind} pool, {cores} CPU cores")
+        print(f"{'workers':>7} {'docs/s':>8} {'speedup':>8} {'efficiency':>11}")
+        baseline = None
+        efficiency = 1.0
+        for workers in pool_sizes:
+            rate = asyncio.run(measure(args.kind, workers, documents))
+            baseline = baseline or rate
+            speedup = rate / baseline
+            efficiency = speedup / (workers / pool_sizes[0])
+            print(f"{workers:>7} {rate:>8.2f} {speedup:>7.2f}x {efficiency:>10.0%}")
+
+    if len(pool_sizes) > 1 and max(pool_sizes) <= cores and efficiency < args.min_efficiency:
+        print(f"scaling efficiency below {args.min_efficiency:.0%}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,137 @@
+"""
+Local fake of the OpenAI chat completions API for benchmarks
+
+Answers every completion after a fixed delay, or fails it with
+fail_status, and records how many calls were in flight at once. FakeOpenAI runs the server on a background thread
+with its own event loop, so it keeps answering even if the code under test
+blocks its caller's loop:
+
+    with FakeOpenAI(delay=0.5) as fake:
+        os.environ["AI_BASE_URL"] = fake.base_url
+        ...
+        print(fake.peak_in_flight)
+
+It can also be run on its own:
+
+    python -m bench.fake_openai [PORT] [--delay SECONDS] [--fail-status CODE]
+"""
+from typing import Optional
+import argparse
+import asyncio
+import json
+import socket
+import threading
+import time
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+class FakeOpenAI:
+    """OpenAI-compatible server answering after a fixed delay"""
+
+    def __init__(self, delay: float = 0.5, port: Optional[int] = None, fail_status: Optional[int] = None):
+        self.delay = delay
+        self.port = port or free_port()
+        self.fail_status = fail_status
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self.app = self._build_app()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/v1/chat/completions")
+        async def completions(request: Request):
+            body = await request.json()
+            with self._lock:
+                self.calls += 1
+                self.in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            try:
+                await asyncio.sleep(self.delay)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+
+            if self.fail_status is not None:
+                return JSONResponse(
+                    {"error": {"message": "Fake provider failure", "type": "server_error"}},
+                    status_code=self.fail_status
+                )
+            text = f"Reply to: {body['messages'][-1]['content'][:40]}"
+            if body.get("stream"):
+                return StreamingResponse(stream_chunks(body["model"], text), media_type="text/event-stream")
+            return {
+                "id": "fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+            }
+
+        return app
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self.peak_in_flight = self.in_flight
+
+    def start(self) -> None:
+        config = uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name="fake-openai", daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError(f"Fake OpenAI server failed to start on port {self.port}")
+            time.sleep(0.01)
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self) -> "FakeOpenAI":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+async def stream_chunks(model: str, text: str):
+    for word in text.split(" "):
+        chunk = {
+            "id": "fake",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+    yield "data: [DONE]\n\n"
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a fake OpenAI chat completions server")
+    parser.add_argument("port", type=int, nargs="?", default=9999)
+    parser.add_argument("--delay", type=float, default=0.5)
+    parser.add_argument("--fail-status", type=int, help="fail every completion with this HTTP status")
+    args = parser.parse_args()
+    uvicorn.run(FakeOpenAI(args.delay, args.port, args.fail_status).app, host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
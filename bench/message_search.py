@@ -0,0 +1,126 @@
+"""
+Message search latency on a large SQLite database
+
+Builds a database from the models with the given number of messages spread
+over many users, then times the search query for terms matching about 1%,
+10% and 100% of all messages. A user only ever sees their own share, so the
+query must not get slower as other users' messages match.
+
+    python -m bench.message_search [--messages N] [--users N] [--db PATH]
+
+The database is kept at --db (default: a temporary file) so repeated runs
+can skip the build. Exits with status 1 if the p95 latency of any query is
+above --target-ms.
+"""
+from typing import List
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from sqlalchemy import create_engine, insert
+from app.database import Base
+from app.models.user import User
+from app.models.chat import Chat
+from app.models.message import Message
+from app.services.message_search import SQLITE_SEARCH_SQL, to_fts5_query, user_rowid_range
+
+CHATS_PER_USER = 10
+WORDS_PER_MESSAGE = 20
+VOCABULARY = [f"w{index}" for index in range(20000)]
+BATCH_SIZE = 10000
+
+# Query term -> share of messages containing it
+QUERIES = {
+    "invoice": 0.01,
+    "contract": 0.10,
+    "the": 1.0,
+}
+
+def message_text(rng: random.Random) -> str:
+    words = rng.choices(VOCABULARY, k=WORDS_PER_MESSAGE)
+    for term, share in QUERIES.items():
+        if rng.random() < share:
+            words[rng.randrange(len(words))] = term
+    return " ".join(words)
+
+def build(engine, messages: int, users: int) -> None:
+    rng = random.Random(42)
+    Base.metadata.create_all(engine)
+    chat_ids = [str(uuid.uuid4()) for _ in range(users * CHATS_PER_USER)]
+
+    with engine.begin() as connection:
+        connection.execute(insert(User), [
+            {"id": user_id, "email": f"user{user_id}@example.com", "full_name": "Bench", "hashed_password": "-"}
+            for user_id in range(1, users + 1)
+        ])
+        connection.execute(insert(Chat), [
+            {"id": chat_id, "user_id": index // CHATS_PER_USER + 1, "title": "Bench"}
+            for index, chat_id in enumerate(chat_ids)
+        ])
+
+    start = time.perf_counter()
+    for batch_start in range(0, messages, BATCH_SIZE):
+        with engine.begin() as connection:
+            connection.execute(insert(Message), [
+                {
+                    "id": str(uuid.uuid4()),
+                    "chat_id": rng.choice(chat_ids),
+                    "content": message_text(rng),
+                    "role": "user"
+                }
+                for _ in range(min(BATCH_SIZE, messages - batch_start))
+            ])
+    print(f"Inserted {messages} messages in {time.perf_counter() - start:.1f}s")
+
+def time_query(engine, user_ids: List[int], term: str, limit: int) -> List[float]:
+    timings = []
+    with engine.connect() as connection:
+        for user_id in user_ids:
+            first_rowid, last_rowid = user_rowid_range(user_id)
+            start = time.perf_counter()
+            connection.execute(SQLITE_SEARCH_SQL, {
+                "query": to_fts5_query(term),
+                "first_rowid": first_rowid,
+                "last_rowid": last_rowid,
+                "limit": limit,
+                "offset": 0
+            }).all()
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_message_search.db"))
+    parser.add_argument("--samples", type=int, default=50, help="users timed per query")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--target-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    engine = create_engine(f"sqlite:///{args.db}")
+    if not os.path.exists(args.db) or os.path.getsize(args.db) == 0:
+        build(engine, args.messages, args.users)
+
+    user_ids = random.Random(7).sample(range(1, args.users + 1), min(args.samples, args.users))
+    # Warm the page cache so the first query is not timed against a cold file
+    time_query(engine, user_ids[:1], "the", args.limit)
+
+    print(f"{'query':<12} {'share':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    slow = False
+    for term, share in QUERIES.items():
+        timings = sorted(time_query(engine, user_ids, term, args.limit))
+        p95 = timings[min(len(timings) - 1, int(0.95 * len(timings)))]
+        slow = slow or p95 > args.target_ms
+        print(f"{term:<12} {share:>6.0%} {statistics.median(timings):>8.1f} {p95:>8.1f} {timings[-1]:>8.1f}")
+
+    if slow:
+        print(f"p95 above {args.target_ms:.0f} ms")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,150 @@
+"""
+Provider routing, failover, hedging and circuit breaking against local fakes
+
+Starts three fake OpenAI servers (slow, fast and failing) and runs
+ProviderRouter over them the way ai_service does:
+
+- hedge: a call routed to the slow provider is hedged on the fast one
+  after the hedge delay, and the hedge answers first
+- failover: a call routed to the failing provider is retried at once on
+  the fast one
+- breaker: after --failure-threshold failures the failing provider's
+  circuit opens, it receives no more calls, and a router with only that
+  provider answers AIServiceUnavailable without calling it
+
+    python -m bench.provider_router [--slow-delay SECONDS] [--hedge-delay SECONDS]
+
+Exits with status 1 if any check fails.
+"""
+from typing import List, Sequence, Tuple
+import argparse
+import asyncio
+import time
+import httpx
+from openai import AsyncOpenAI
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.provider_router import AIServiceUnavailable, Provider, ProviderRouter
+from bench.fake_openai import FakeOpenAI
+
+MODEL = "bench-model"
+
+# Routing is random by weight; this weight makes the provider under test
+# the first choice every time while the others remain available
+PREFERRED_WEIGHT = 1_000_000
+
+def provider(name: str, fake: FakeOpenAI, http_client: httpx.AsyncClient, weight: float,
+             failure_threshold: int) -> Provider:
+    return Provider(
+        name=name,
+        model=MODEL,
+        weight=weight,
+        client=AsyncOpenAI(base_url=fake.base_url, api_key="bench", http_client=http_client, max_retries=0),
+        breaker=CircuitBreaker(failure_threshold=failure_threshold, reset_seconds=60.0)
+    )
+
+async def ask(router: ProviderRouter, hedge: bool = True) -> Tuple[str, float]:
+    """Run one completion, returning the name of the provider that answered and the elapsed time"""
+    async def call(provider: Provider) -> str:
+        await provider.client.chat.completions.create(
+            model=provider.model,
+            messages=[{"role": "user", "content": "What is a promissory note?"}]
+        )
+        return provider.name
+
+    start = time.perf_counter()
+    name = await router.run(call, hedge=hedge)
+    return name, time.perf_counter() - start
+
+async def run(args: argparse.Namespace, slow: FakeOpenAI, fast: FakeOpenAI, failing: FakeOpenAI) -> List[Tuple[str, bool, str]]:
+    checks = []
+
+    def check(name: str, passed: bool, detail: str) -> None:
+        checks.append((name, passed, detail))
+
+    def build(preferred: str, fakes: Sequence[Tuple[str, FakeOpenAI]], hedge: bool) -> ProviderRouter:
+        return ProviderRouter(
+            [
+                provider(name, fake, http_client, PREFERRED_WEIGHT if name == preferred else 1,
+                         args.failure_threshold)
+                for name, fake in fakes
+            ],
+            hedge_enabled=hedge,
+            hedge_initial_delay=args.hedge_delay,
+            hedge_min_delay=args.hedge_delay,
+            attempt_timeout=args.slow_delay * 4,
+            deadline=args.slow_delay * 8
+        )
+
+    async with httpx.AsyncClient(timeout=args.slow_delay * 4) as http_client:
+        # Hedge: the slow primary is still running after the hedge delay
+        router = build("slow", [("slow", slow), ("fast", fast)], hedge=True)
+        winner, elapsed = await ask(router)
+        check("hedge wins", winner == "fast" and elapsed < args.slow_delay,
+              f"answered by {winner} in {elapsed:.2f}s (slow provider takes {args.slow_delay:.2f}s)")
+
+        # Without hedging the same call waits for the slow provider
+        router = build("slow", [("slow", slow), ("fast", fast)], hedge=False)
+        winner, elapsed = await ask(router)
+        check("no hedge when disabled", winner == "slow" and elapsed >= args.slow_delay,
+              f"answered by {winner} in {elapsed:.2f}s")
+
+        # Failover: the failing provider's 500 is retried on the fast one
+        failing.reset()
+        fast.reset()
+        router = build("failing", [("failing", failing), ("fast", fast)], hedge=False)
+        winner, elapsed = await ask(router)
+        check("failover", winner == "fast" and failing.calls == 1 and fast.calls == 1,
+              f"answered by {winner} after {failing.calls} failed call(s)")
+
+        # Breaker: keep routing to the failing provider until its circuit opens
+        failing.reset()
+        fast.reset()
+        router = build("failing", [("failing", failing), ("fast", fast)], hedge=False)
+        winners = [(await ask(router))[0] for _ in range(args.failure_threshold + 5)]
+        breaker = router.providers[0].breaker
+        check("breaker opens", breaker.state == CircuitBreaker.OPEN and failing.calls == args.failure_threshold,
+              f"failing provider called {failing.calls} times over {len(winners)} requests, circuit {breaker.state}")
+        check("calls still answered", all(name == "fast" for name in winners),
+              f"{winners.count('fast')}/{len(winners)} answered by the fast provider")
+
+        # With only the failing provider, an open circuit fails fast
+        failing.reset()
+        router = build("failing", [("failing", failing)], hedge=False)
+        for _ in range(args.failure_threshold):
+            try:
+                await ask(router)
+            except AIServiceUnavailable:
+                pass
+        calls_before = failing.calls
+        try:
+            await ask(router)
+            check("open circuit fails fast", False, "call unexpectedly succeeded")
+        except AIServiceUnavailable as e:
+            check("open circuit fails fast", failing.calls == calls_before and (e.retry_after or 0) > 0,
+                  f"AIServiceUnavailable, retry after {e.retry_after:.0f}s, provider not called")
+
+    return checks
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--slow-delay", type=float, default=1.5)
+    parser.add_argument("--fast-delay", type=float, default=0.05)
+    parser.add_argument("--hedge-delay", type=float, default=0.3)
+    parser.add_argument("--failure-threshold", type=int, default=3)
+    args = parser.parse_args()
+
+    with FakeOpenAI(delay=args.slow_delay) as slow, \
+            FakeOpenAI(delay=args.fast_delay) as fast, \
+            FakeOpenAI(delay=args.fast_delay, fail_status=500) as failing:
+        checks = asyncio.run(run(args, slow, fast, failing))
+
+    width = max(len(name) for name, _, _ in checks)
+    for name, passed, detail in checks:
+        print(f"{'PASS' if passed else 'FAIL'}  {name:<{width}}  {detail}")
+
+    if not all(passed for _, passed, _ in checks):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
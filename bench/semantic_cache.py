@@ -0,0 +1,105 @@
+"""
+Semantic cache lookup latency with a large index
+
+Fills one namespace of the semantic cache with --entries distinct questions,
+then times get() for near duplicates of stored questions (hits) and for
+unrelated questions (misses). A lookup embeds the question and scores it
+against every stored vector, so its cost grows with the index size.
+
+    python -m bench.semantic_cache [--entries N] [--lookups N]
+
+Exits with status 1 if the p95 lookup latency is above --target-ms.
+"""
+from typing import List, Optional, Tuple
+import argparse
+import random
+import statistics
+import time
+from app.core.config import settings
+from app.services.semantic_cache import SemanticCache
+
+NAMESPACE = "bench:legal_advice"
+
+TOPICS = [
+    "loan", "mortgage", "lease", "contract", "invoice", "pension", "tax", "deposit",
+    "guarantee", "bankruptcy", "inheritance", "dividend", "insurance", "salary", "fine",
+]
+SUBJECTS = [
+    "my landlord", "my employer", "the bank", "a supplier", "my business partner",
+    "the tax office", "a client", "my insurer", "the seller", "a contractor",
+]
+
+# Stand-ins for the names, places and amounts that make questions distinct
+DETAILS = [f"d{index}" for index in range(5000)]
+
+def question(rng: random.Random) -> str:
+    details = " ".join(rng.sample(DETAILS, 3))
+    return (
+        f"Can {rng.choice(SUBJECTS)} change the {rng.choice(TOPICS)} terms "
+        f"agreed for {details} without my written consent?"
+    )
+
+def reworded(text: str) -> str:
+    # A near duplicate: same question with a different ending
+    return text.replace("without my written consent?", "without my written consent, please?")
+
+def percentile(timings: List[float], share: float) -> float:
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+def time_lookups(cache: SemanticCache, questions: List[str]) -> Tuple[List[float], List[Optional[str]]]:
+    timings, answers = [], []
+    for text in questions:
+        start = time.perf_counter()
+        answers.append(cache.get(NAMESPACE, text))
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, answers
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--threshold", type=float, default=settings.semantic_cache_threshold)
+    parser.add_argument("--dimensions", type=int, default=settings.semantic_cache_dimensions)
+    parser.add_argument("--target-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    cache = SemanticCache(
+        threshold=args.threshold,
+        dimensions=args.dimensions,
+        max_entries=args.entries,
+        ttl_seconds=24 * 60 * 60
+    )
+    stored = [question(rng) for _ in range(args.entries)]
+    start = time.perf_counter()
+    for index, text in enumerate(stored):
+        cache.set(NAMESPACE, text, f"answer {index}")
+    print(f"Stored {args.entries} entries in {time.perf_counter() - start:.1f}s "
+          f"({args.dimensions} dimensions, threshold {args.threshold})")
+
+    sampled = rng.sample(range(args.entries), args.lookups)
+    near_duplicates = ([reworded(stored[index]) for index in sampled], [f"answer {index}" for index in sampled])
+    unrelated = (
+        [f"How are {rng.choice(TOPICS)} payments split after a divorce in year {year}?" for year in range(args.lookups)],
+        [None] * args.lookups
+    )
+
+    # "expected" counts lookups that returned the stored answer for a near
+    # duplicate, or nothing for an unrelated question
+    print(f"{'lookup':<16} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'expected':>9}")
+    slow = False
+    for label, (questions, expected) in (("near duplicate", near_duplicates), ("unrelated", unrelated)):
+        timings, answers = time_lookups(cache, questions)
+        correct = sum(1 for answer, want in zip(answers, expected) if answer == want) / len(questions)
+        p95 = percentile(timings, 0.95)
+        slow = slow or p95 > args.target_ms
+        print(f"{label:<16} {statistics.median(timings):>8.2f} {p95:>8.2f} {max(timings):>8.2f} {correct:>9.0%}")
+
+    if slow:
+        print(f"p95 above {args.target_ms:.0f} ms")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())